@@ -50,7 +50,9 @@ namespace PoEAssetReader.DatFiles.Definitions
 				{
 					string id = jsonFieldDefinition.Value<string>("id");
 					string dataType = jsonFieldDefinition.Value<string>("type");
-					fields.Add(new FieldDefinition(id, TypeDefinition.Parse(dataType, false), null, null));
+					string refDatFileName = jsonFieldDefinition.Value<string>("key");
+					string refDatFieldID = jsonFieldDefinition.Value<string>("key_id");
+					fields.Add(new FieldDefinition(id, TypeDefinition.Parse(dataType, false), refDatFileName, refDatFieldID));
 				}
 				fileDefinitions.Add(new FileDefinition(name, fields.ToArray()));
 			}
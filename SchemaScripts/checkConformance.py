@@ -0,0 +1,148 @@
+import argparse
+import concurrent.futures
+import os
+import sys
+
+import numpy
+
+import datReader
+import recordLayout
+import specification
+
+# Checks extracted .dat/.datc64 files against their stable.py definitions, so stale definitions are found before an
+# export instead of ending up in the _Remainder* fields of DatFile. For every file it compares the declared row width
+# with the measured one, and when those match it checks that all strings, lists and foreign keys point to something.
+# Files are checked in parallel, the exit code is 1 when any file doesn't conform.
+# Usage: python checkConformance.py path/to/extracted/Data [--jobs N] [--source path/to/stable.py]
+
+# foreign keys without a row, as stored in .dat and .datc64 files
+nullKeys = (0xFEFEFEFEFEFEFEFE, 0xFFFFFFFFFFFFFFFF, 0xFEFEFEFE, 0xFFFFFFFF)
+
+spec = None
+
+def loadWorker(sourcePath):
+    global spec
+    spec = specification.loadSpecification(sourcePath, lazy=True)
+
+def findDatFiles(directory):
+    # all .dat/.datc64 files below directory, the language folders included
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for fileName in sorted(files):
+            if fileName.lower().endswith(('.dat', '.datc64')):
+                paths.append(os.path.join(root, fileName))
+    return paths
+
+def getTableName(path, tableNames):
+    # the stable.py name of a file, matched without case like DatFile does, or None
+    baseName = os.path.splitext(os.path.basename(path))[0].lower()
+    return tableNames.get(baseName + '.dat')
+
+def readRowCounts(paths):
+    # {table name: row count}, a foreign key may point at any row of the english table
+    rowCounts = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            rowCount = int.from_bytes(f.read(4), 'little')
+        tableName = os.path.splitext(os.path.basename(path))[0].lower() + '.dat'
+        rowCounts[tableName] = max(rowCount, rowCounts.get(tableName, 0))
+    return rowCounts
+
+def getKeys(field, column):
+    # the row indexes a column holds, None if it doesn't hold foreign keys (key_id references a value, not a row)
+    if field.key is None or field.key_id is not None or field.type == 'ref|generic':
+        return None
+    if isinstance(column, datReader.ListColumn):
+        return column.getItems()[0]
+    return column
+
+def findBadReferences(table, rowCounts, tableNames):
+    # [(column name, number of values, problem)] for the columns with values that point nowhere
+    problems = []
+    dataSize = len(table.data) - table.dataOffset
+    minOffset = len(recordLayout.magicNumber)
+    for name in table.names:
+        field = table.columnsByName[name].field
+        column = table.getColumn(name)
+        if isinstance(column, datReader.StringColumn):
+            badCount = numpy.count_nonzero((column.offsets < minOffset) | (column.offsets >= dataSize))
+            if badCount:
+                problems.append((name, badCount, 'string offsets outside of the data section'))
+            continue
+        if isinstance(column, datReader.ListColumn):
+            ends = column.offsets.astype(numpy.float64) + column.counts.astype(numpy.float64) * column.itemWidth
+            badCount = numpy.count_nonzero((column.counts > 0) & ((column.offsets < minOffset) | (ends > dataSize)))
+            if badCount:
+                problems.append((name, badCount, 'lists outside of the data section'))
+                continue
+        keys = getKeys(field, column)
+        if keys is None or len(keys) == 0:
+            continue
+        referencedRowCount = rowCounts.get(field.key.lower())
+        if referencedRowCount is None:
+            reason = 'is not in the directory' if field.key.lower() in tableNames else 'is not defined in stable.py'
+            problems.append((name, len(keys), f'keys to {field.key}, which {reason}'))
+            continue
+        if keys.dtype.kind == 'i':
+            # -1 and 0xFEFEFEFE as an int
+            keys = keys.view(f'u{keys.dtype.itemsize}')
+        keys = keys.astype(numpy.uint64)
+        badCount = numpy.count_nonzero((keys >= referencedRowCount) & ~numpy.isin(keys, numpy.array(nullKeys, numpy.uint64)))
+        if badCount:
+            problems.append((name, badCount, f'keys past the {referencedRowCount} rows of {field.key}'))
+    return problems
+
+def checkFile(path, tableName, rowCounts, tableNames):
+    # (path, measured row width, declared row width, [problems])
+    x64 = path.lower().endswith('.datc64')
+    layout = recordLayout.compileLayout(tableName, spec[tableName], x64)
+    with open(path, 'rb') as f:
+        data = f.read()
+    rowWidth = recordLayout.findRowWidth(data)
+    if rowWidth is None:
+        return path, None, layout.rowWidth, [(None, 0, 'no magic number after the rows')]
+    if rowWidth == 0 and int.from_bytes(data[:4], 'little') == 0:
+        # no rows, so there's no width to compare and nothing that points anywhere
+        return path, layout.rowWidth, layout.rowWidth, []
+    if rowWidth != layout.rowWidth:
+        return path, rowWidth, layout.rowWidth, []
+    table = datReader.DatTable(os.path.basename(path), data, layout, rowWidth)
+    return path, rowWidth, layout.rowWidth, findBadReferences(table, rowCounts, tableNames)
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks .dat/.datc64 files against stable.py.')
+    parser.add_argument('directory')
+    parser.add_argument('--source', default=specification.defaultSourcePath, help='path to stable.py')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    loadWorker(args.source)
+    tableNames = {tableName.lower(): tableName for tableName in spec}
+    paths = findDatFiles(args.directory)
+    rowCounts = readRowCounts(paths)
+    undefined = [path for path in paths if getTableName(path, tableNames) is None]
+    checked = [(path, getTableName(path, tableNames)) for path in paths if path not in undefined]
+
+    with concurrent.futures.ProcessPoolExecutor(max(1, args.jobs), initializer=loadWorker, initargs=(args.source,)) as executor:
+        futures = [executor.submit(checkFile, path, tableName, rowCounts, tableNames) for path, tableName in checked]
+        results = [future.result() for future in futures]
+
+    failed = 0
+    for path, rowWidth, declaredRowWidth, problems in results:
+        relativePath = os.path.relpath(path, args.directory)
+        if rowWidth is not None and rowWidth != declaredRowWidth:
+            failed += 1
+            difference = rowWidth - declaredRowWidth
+            print(f'{relativePath}: rows are {rowWidth} bytes, stable.py defines {declaredRowWidth} ({"+" if difference > 0 else ""}{difference} bytes {"not defined" if difference > 0 else "too many defined"})')
+        elif problems:
+            failed += 1
+            for name, count, problem in problems:
+                print(f'{relativePath}: ' + (f'{name}: {count} {problem}' if name is not None else problem))
+    for path in undefined:
+        print(f'{os.path.relpath(path, args.directory)}: not defined in stable.py')
+    print(f'{len(checked)} files checked, {failed} with problems, {len(undefined)} without a definition')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+
+import recordLayout
+import specification
+
+# Compiles stable.py into the json DatDefinitions.ParseJson reads, so the updater can load a checked schema instead of
+# scraping stable.py line by line in DatDefinitions.ParsePyPoE:
+# [{"name": "Stats.dat", "fields": [{"id": "Id", "type": "ref|string", "unique": true}, ...]}, ...]
+# key and key_id are read as the reference of a field, the other stable.py keywords (key_offset, enum, unique,
+# file_path, file_ext) are kept as extra keys. Keywords with their default value are left out.
+# Usage: python compileDatSchema.py [--output ../Resources/stable.json] [--source path/to/stable.py]
+
+defaultOutputPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Resources', 'stable.json')
+
+def toFieldJson(field):
+    fieldJson = {'id': field.name, 'type': field.type}
+    if field.key is not None:
+        fieldJson['key'] = field.key
+    if field.key_id is not None:
+        fieldJson['key_id'] = field.key_id
+    if field.key_offset:
+        fieldJson['key_offset'] = field.key_offset
+    if field.enum is not None:
+        fieldJson['enum'] = field.enum
+    if field.unique:
+        fieldJson['unique'] = True
+    if field.file_path:
+        fieldJson['file_path'] = True
+    if field.file_ext is not None:
+        fieldJson['file_ext'] = field.file_ext
+    return fieldJson
+
+def toJson(spec):
+    return [{'name': fileName, 'fields': [toFieldJson(field) for field in file.fields]} for fileName, file in spec.items()]
+
+def findProblems(spec):
+    # what would make the updater fail or read wrong values: types it can't lay out and keys to undefined tables
+    problems = []
+    for fileName, file in spec.items():
+        for field in file.fields:
+            try:
+                recordLayout.getColumnWidth(field, True)
+            except ValueError as e:
+                problems.append(f'{fileName}.{field.name}: {e}')
+            if field.key is not None and field.key not in spec:
+                problems.append(f'{fileName}.{field.name}: references {field.key}, which is not defined')
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiles stable.py into the json schema of DatDefinitions.ParseJson.')
+    parser.add_argument('--source', default=specification.defaultSourcePath, help='path to stable.py')
+    parser.add_argument('--output', default=defaultOutputPath)
+    parser.add_argument('--strict', action='store_true', help="don't write the schema when there are problems")
+    args = parser.parse_args()
+
+    spec = specification.loadSpecification(args.source)
+    problems = findProblems(spec)
+    for problem in problems:
+        print(problem)
+    if problems and args.strict:
+        sys.exit(1)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(toJson(spec), f, separators=(',', ':'))
+    print(f'Wrote {len(spec)} tables, {sum(len(file.fields) for file in spec.values())} fields to {args.output}')
+
+if __name__ == '__main__':
+    main()
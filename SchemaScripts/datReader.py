@@ -0,0 +1,318 @@
+import argparse
+import os
+import struct
+import time
+
+import numpy
+
+import recordLayout
+import specification
+import syntheticDat
+
+# Columnar .dat/.datc64 reader driven by stable.py. The fixed-width rows of a table are decoded with a single
+# numpy.frombuffer call into a structured array, so every fixed-width column is a numpy array. Strings and lists
+# live in the data section and are only resolved when a column or value is requested. Needs numpy.
+# Usage: python datReader.py path/to/Stats.datc64 [--benchmark], or Stats.datc64 --synthetic 50000 without game files
+
+fixedFormats = {
+    'bool': '?',
+    'byte': 'u1',
+    'short': '<i2',
+    'ushort': '<u2',
+    'int': '<i4',
+    'uint': '<u4',
+    'float': '<f4',
+    'long': '<i8',
+    'ulong': '<u8',
+    'int128': ('<u8', (2,)),
+    'uint128': ('<u8', (2,)),
+}
+
+def getValueFormat(type, width):
+    # numpy format of a value of this type, width from recordLayout.getValueWidth
+    if type.startswith(recordLayout.listPrefix):
+        # count and offset
+        return ('<u8' if width == 16 else '<u4', (2,))
+    if type.startswith(recordLayout.refPrefix):
+        # offset into the data section (or a row index for ref|generic)
+        return '<u8' if width == 8 else '<u4'
+    if type.startswith('byte['):
+        return ('u1', (width,))
+    if type == 'ulong' and width == 16:
+        # foreign key of a .datc64 file, the row index is the first half
+        return ('<u8', (2,))
+    return fixedFormats[type]
+
+def getItemType(type):
+    # the type of the values a ref| or ref|list| column points to
+    if type.startswith(recordLayout.listPrefix):
+        return type[len(recordLayout.listPrefix):]
+    return type[len(recordLayout.refPrefix):]
+
+def getColumnNames(layout):
+    # field names, with a suffix for the names stable.py defines twice in a table
+    names = []
+    seen = set()
+    for column in layout.columns:
+        name = column.field.name
+        idx = 1
+        while name in seen:
+            name = f'{column.field.name}_{idx}'
+            idx += 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+def getRowDtype(layout, names):
+    return numpy.dtype({
+        'names': names,
+        'formats': [getValueFormat(column.field.type, column.width) for column in layout.columns],
+        'offsets': [column.offset for column in layout.columns],
+        'itemsize': layout.rowWidth,
+    })
+
+class StringColumn:
+    # the strings of a ref|string column, decoded from the data section on access
+    def __init__(self, table, offsets):
+        self.table = table
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, rowIdx):
+        return self.table.readString(int(self.offsets[rowIdx]))
+
+    def __iter__(self):
+        readString = self.table.readString
+        return (readString(offset) for offset in self.offsets.tolist())
+
+class ListColumn:
+    # the lists of a ref|list| column, read from the data section on access
+    def __init__(self, table, countsAndOffsets, itemType, itemWidth, foreignKey):
+        self.table = table
+        self.counts = countsAndOffsets[:, 0]
+        self.offsets = countsAndOffsets[:, 1]
+        self.itemType = itemType
+        self.itemWidth = itemWidth
+        self.itemFormat = getValueFormat(itemType, itemWidth)
+        self.foreignKey = foreignKey
+        self.items = None
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __getitem__(self, rowIdx):
+        return self.table.readList(int(self.counts[rowIdx]), int(self.offsets[rowIdx]), self.itemType, self.itemFormat, self.foreignKey)
+
+    def getItems(self):
+        # the items of all rows gathered into one array, and where the items of each row start and end in it
+        if self.items is None:
+            counts = self.counts.astype(numpy.int64)
+            ends = numpy.cumsum(counts)
+            # byte position of every item: its row's list start plus its index in the list times the item width
+            itemIdxs = numpy.arange(ends[-1] if len(ends) else 0) - numpy.repeat(ends - counts, counts)
+            itemStarts = numpy.repeat(self.table.dataOffset + self.offsets.astype(numpy.int64), counts) + itemIdxs * self.itemWidth
+            data = numpy.frombuffer(self.table.data, 'u1')
+            items = data[itemStarts[:, None] + numpy.arange(self.itemWidth)].view(numpy.dtype(self.itemFormat).base)
+            items = items[:, 0] if self.foreignKey or items.shape[1] == 1 else items
+            self.items = (items, ends - counts, ends)
+        return self.items
+
+    def __iter__(self):
+        items, starts, ends = self.getItems()
+        if self.itemType == 'ref|string':
+            strings = [self.table.readString(offset) for offset in items.tolist()]
+            return (strings[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+        return (items[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+
+class DatTable:
+    # fileName: Name.dat or Name.datc64, data: the file contents, layout: its recordLayout.TableLayout,
+    # rowWidth: the findRowWidth of data when the caller already measured it
+    def __init__(self, fileName, data, layout, rowWidth=None):
+        self.fileName = fileName
+        self.data = data
+        self.layout = layout
+        self.rowCount = int.from_bytes(data[:4], 'little')
+        if rowWidth is None:
+            rowWidth = recordLayout.findRowWidth(data)
+        # a table without rows has no width to measure, its magic number directly follows the row count
+        if rowWidth != layout.rowWidth and not (self.rowCount == 0 and rowWidth == 0):
+            raise ValueError(f'{fileName} has {rowWidth} byte rows, but stable.py defines {layout.rowWidth} bytes')
+        self.dataOffset = 4 + self.rowCount * layout.rowWidth
+        self.names = getColumnNames(layout)
+        self.columnsByName = dict(zip(self.names, layout.columns))
+        self.rows = numpy.frombuffer(data, getRowDtype(layout, self.names), count=self.rowCount, offset=4)
+        self.strings = {}
+        self.columns = {}
+        self.indexes = {}
+
+    def __len__(self):
+        return self.rowCount
+
+    def readString(self, offset):
+        # strings are UTF-16 and end with int(0), offsets are relative to the data section (which starts with the magic number)
+        string = self.strings.get(offset)
+        if string is None:
+            start = self.dataOffset + offset
+            end = self.data.find(b'\0\0', start)
+            while end != -1 and (end - start) % 2:
+                end = self.data.find(b'\0\0', end + 1)
+            string = self.data[start:end if end != -1 else len(self.data)].decode('utf-16-le', 'replace')
+            self.strings[offset] = string
+        return string
+
+    def readList(self, count, offset, itemType, itemFormat, foreignKey):
+        if count == 0:
+            return []
+        start = self.dataOffset + offset
+        items = numpy.frombuffer(self.data, itemFormat, count=count, offset=start)
+        if itemType == 'ref|string':
+            return [self.readString(int(itemOffset)) for itemOffset in items]
+        if foreignKey and items.ndim == 2:
+            return items[:, 0]
+        return items
+
+    def getColumn(self, name):
+        # a numpy array for fixed-width columns (foreign keys as row indexes), StringColumn or ListColumn otherwise
+        column = self.columns.get(name)
+        if column is None:
+            layoutColumn = self.columnsByName[name]
+            type = layoutColumn.field.type
+            values = self.rows[name]
+            foreignKey = layoutColumn.field.key is not None
+            if type == 'ref|string':
+                column = StringColumn(self, values)
+            elif type.startswith(recordLayout.listPrefix):
+                column = ListColumn(self, values, getItemType(type), recordLayout.getItemWidth(layoutColumn.field, self.layout.x64), foreignKey)
+            elif foreignKey and values.ndim == 2:
+                column = values[:, 0]
+            else:
+                column = values
+            self.columns[name] = column
+        return column
+
+    def getRow(self, rowIdx):
+        # {name: value} of one row, like a DatRecord
+        return {name: self.getColumn(name)[rowIdx] for name in self.names}
+
+    def getIndex(self, name):
+        # {value: row index} of a unique=True column, built on first use and kept as long as the table
+        index = self.indexes.get(name)
+        if index is None:
+            if not self.columnsByName[name].field.unique:
+                raise ValueError(f'{self.fileName}.{name} is not a unique column')
+            column = self.getColumn(name)
+            values = column.tolist() if isinstance(column, numpy.ndarray) else column
+            index = {}
+            for rowIdx, value in enumerate(values):
+                # like the first match of a scan, should stable.py be wrong about the uniqueness
+                index.setdefault(value, rowIdx)
+            self.indexes[name] = index
+        return index
+
+    def findRow(self, name, value):
+        # the row index with this value in a unique column, or None
+        return self.getIndex(name).get(value)
+
+def getTableLayout(fileName, spec=None):
+    # the layout of Name.dat/Name.datc64, stable.py only names the .dat
+    baseName, ext = os.path.splitext(fileName)
+    if spec is None:
+        spec = specification.loadSpecification(lazy=True)
+    return recordLayout.compileLayout(baseName + '.dat', spec[baseName + '.dat'], ext == '.datc64')
+
+def openTable(path, spec=None):
+    with open(path, 'rb') as f:
+        data = f.read()
+    fileName = os.path.basename(path)
+    return DatTable(fileName, data, getTableLayout(fileName, spec))
+
+def decodeRows(fileName, data, layout):
+    # the row by row decoding DatFile does (a dict per row, strings and lists resolved immediately), for benchmarking
+    rowCount = int.from_bytes(data[:4], 'little')
+    dataOffset = 4 + rowCount * layout.rowWidth
+    structFormats = {'bool': '?', 'byte': 'B', 'short': 'h', 'ushort': 'H', 'int': 'i', 'uint': 'I', 'float': 'f', 'long': 'q', 'ulong': 'Q'}
+    pointerFormat = '<Q' if layout.x64 else '<I'
+
+    def readString(offset):
+        start = dataOffset + offset
+        end = data.find(b'\0\0', start)
+        while end != -1 and (end - start) % 2:
+            end = data.find(b'\0\0', end + 1)
+        return data[start:end].decode('utf-16-le', 'replace')
+
+    def readValue(type, width, pos, foreignKey):
+        if type == 'ref|string':
+            return readString(struct.unpack_from(pointerFormat, data, pos)[0])
+        if type.startswith(recordLayout.listPrefix):
+            count, offset = struct.unpack_from('<QQ' if layout.x64 else '<II', data, pos)
+            itemType = getItemType(type)
+            itemWidth = recordLayout.getValueWidth(itemType, layout.x64, foreignKey)
+            return [readValue(itemType, itemWidth, dataOffset + offset + idx * itemWidth, foreignKey) for idx in range(count)]
+        if type.startswith(recordLayout.refPrefix) or type.startswith('byte['):
+            return data[pos:pos + width]
+        if width == 16:
+            return struct.unpack_from('<Q', data, pos)[0]
+        return struct.unpack_from('<' + structFormats[type], data, pos)[0]
+
+    rows = []
+    for rowIdx in range(rowCount):
+        rowStart = 4 + rowIdx * layout.rowWidth
+        rows.append({column.field.name: readValue(column.field.type, column.width, rowStart + column.offset, column.field.key is not None) for column in layout.columns})
+    return rows
+
+def benchmark(table):
+    # decodes every column of the table, both columnar and row by row
+    start = time.perf_counter()
+    columnarTable = DatTable(table.fileName, table.data, table.layout)
+    for name in columnarTable.names:
+        column = columnarTable.getColumn(name)
+        if not isinstance(column, numpy.ndarray):
+            for _ in column:
+                pass
+    columnarSeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decodeRows(table.fileName, table.data, table.layout)
+    rowSeconds = time.perf_counter() - start
+    print(f'columnar:   {columnarSeconds * 1000:10.1f}ms')
+    print(f'row by row: {rowSeconds * 1000:10.1f}ms ({rowSeconds / columnarSeconds:.1f}x)')
+
+    # a lookup per row of a unique column, like the Records.Single(x => x.Id == ...) calls in a loop of Program.cs
+    lookupCount = min(len(table), 1000)
+    for name in columnarTable.names:
+        if not columnarTable.columnsByName[name].field.unique:
+            continue
+        column = columnarTable.getColumn(name)
+        values = column.tolist() if isinstance(column, numpy.ndarray) else list(column)
+        lookups = values[::max(1, len(values) // lookupCount)][:lookupCount]
+        start = time.perf_counter()
+        for value in lookups:
+            next(rowIdx for rowIdx, rowValue in enumerate(values) if rowValue == value)
+        scanSeconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for value in lookups:
+            columnarTable.findRow(name, value)
+        indexSeconds = time.perf_counter() - start
+        print(f'{len(lookups)} lookups of {name}: scan {scanSeconds * 1000:.1f}ms, index {indexSeconds * 1000:.1f}ms including building it ({scanSeconds / indexSeconds:.0f}x)')
+
+def main():
+    parser = argparse.ArgumentParser(description='Reads a .dat/.datc64 file with its stable.py definition.')
+    parser.add_argument('path')
+    parser.add_argument('--benchmark', action='store_true', help='compare with row by row decoding')
+    parser.add_argument('--synthetic', type=int, metavar='ROWS', help='read a generated table with this many rows instead of the file at path')
+    args = parser.parse_args()
+
+    if args.synthetic is not None:
+        fileName = os.path.basename(args.path)
+        layout = getTableLayout(fileName)
+        table = DatTable(fileName, syntheticDat.buildTable(layout, args.synthetic), layout)
+    else:
+        table = openTable(args.path)
+    print(f'{table.fileName}: {len(table)} rows of {table.layout.rowWidth} bytes, {len(table.names)} columns')
+    if args.benchmark:
+        benchmark(table)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import difflib
+import os
+import subprocess
+import time
+
+import recordLayout
+import specification
+
+# Compares two versions of stable.py table by table instead of line by line: fields are matched by name and position,
+# and the inserted, removed, renamed and retyped fields are listed with how they shift the columns after them.
+# Only the tables whose text differs are parsed, so a diff of a whole update takes a fraction of a second.
+# Usage: python diffSpecification.py OLD [NEW] [--dat], OLD/NEW are paths to stable.py or git revisions (e.g. HEAD),
+# NEW defaults to Resources/stable.py
+
+repositoryPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def readSource(pathOrRevision):
+    if os.path.isfile(pathOrRevision):
+        with open(pathOrRevision, 'rb') as f:
+            return f.read()
+    return subprocess.run(['git', 'show', f'{pathOrRevision}:Resources/stable.py'], cwd=repositoryPath, capture_output=True, check=True).stdout
+
+def getEntries(source):
+    return {fileName: source[start:end].decode('utf-8') for fileName, (start, end) in specification.findEntries(source).items()}
+
+def getTypeName(field):
+    # the key is part of the type, a ulong with a key is a uint128 in .datc64 files
+    return field.type if field.key is None else f'{field.type} (key={field.key})'
+
+def matchFields(oldFields, newFields):
+    # [(old index or None, new index or None)]. Fields are matched by name first, what's left in between two
+    # matched names is matched by type (renamed fields, like UnknownN getting a name).
+    matches = []
+    names = difflib.SequenceMatcher(None, [field.name for field in oldFields], [field.name for field in newFields], autojunk=False)
+    for tag, i1, i2, j1, j2 in names.get_opcodes():
+        if tag == 'equal':
+            matches += zip(range(i1, i2), range(j1, j2))
+            continue
+        types = difflib.SequenceMatcher(None, [getTypeName(field) for field in oldFields[i1:i2]], [getTypeName(field) for field in newFields[j1:j2]], autojunk=False)
+        for typeTag, k1, k2, l1, l2 in types.get_opcodes():
+            if typeTag == 'equal':
+                matches += zip(range(i1 + k1, i1 + k2), range(j1 + l1, j1 + l2))
+            else:
+                matches += [(idx, None) for idx in range(i1 + k1, i1 + k2)]
+                matches += [(None, idx) for idx in range(j1 + l1, j1 + l2)]
+    return matches
+
+def diffTable(fileName, oldFile, newFile, x64):
+    # [change line] for one table defined in both versions, empty if its columns are the same
+    oldLayout = recordLayout.compileLayout(fileName, oldFile, x64)
+    newLayout = recordLayout.compileLayout(fileName, newFile, x64)
+    changes = []
+    shift = 0
+    for oldIdx, newIdx in matchFields(oldFile.fields, newFile.fields):
+        if newIdx is None:
+            oldColumn = oldLayout.columns[oldIdx]
+            changes.append(f'\t- removed {oldColumn.field.name} ({getTypeName(oldColumn.field)}) at offset {oldColumn.offset}')
+            continue
+        newColumn = newLayout.columns[newIdx]
+        if oldIdx is None:
+            changes.append(f'\t+ inserted {newColumn.field.name} ({getTypeName(newColumn.field)}) at offset {newColumn.offset}')
+            continue
+        oldColumn = oldLayout.columns[oldIdx]
+        if oldColumn.field.name != newColumn.field.name:
+            changes.append(f'\t= renamed {oldColumn.field.name} to {newColumn.field.name} ({getTypeName(newColumn.field)})')
+        if getTypeName(oldColumn.field) != getTypeName(newColumn.field):
+            changes.append(f'\t~ retyped {newColumn.field.name} from {getTypeName(oldColumn.field)} to {getTypeName(newColumn.field)}' + (f' ({newColumn.width - oldColumn.width:+} bytes)' if newColumn.width != oldColumn.width else ''))
+        if newColumn.offset - oldColumn.offset != shift:
+            shift = newColumn.offset - oldColumn.offset
+            changes.append(f'\t> {newColumn.field.name} and the columns after it moved {shift:+} bytes (offset {oldColumn.offset} to {newColumn.offset})')
+    if not changes:
+        return []
+    rowWidths = f'{oldLayout.rowWidth} bytes' if oldLayout.rowWidth == newLayout.rowWidth else f'{oldLayout.rowWidth} to {newLayout.rowWidth} bytes ({newLayout.rowWidth - oldLayout.rowWidth:+})'
+    return [f'{newLayout.fileName}: rows {rowWidths}'] + changes
+
+def diffSpecifications(oldSource, newSource, x64=True):
+    # [change line] between two versions of the source of stable.py
+    oldEntries = getEntries(oldSource)
+    newEntries = getEntries(newSource)
+    lines = []
+    for fileName, oldEntry in oldEntries.items():
+        if fileName not in newEntries:
+            fields = specification.parseEntry(fileName, oldEntry).fields
+            lines.append(f'Removed table {fileName} ({len(fields)} fields)')
+    for fileName, newEntry in newEntries.items():
+        oldEntry = oldEntries.get(fileName)
+        if oldEntry is None:
+            fields = specification.parseEntry(fileName, newEntry).fields
+            lines.append(f'Added table {fileName} ({len(fields)} fields)')
+        elif oldEntry != newEntry and oldEntry.split() != newEntry.split():
+            # the text differs, but it can still be a comment or a description only
+            lines += diffTable(fileName, specification.parseEntry(fileName, oldEntry), specification.parseEntry(fileName, newEntry), x64)
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the tables of two versions of stable.py.')
+    parser.add_argument('old', help='path to the old stable.py, or a git revision')
+    parser.add_argument('new', nargs='?', default=specification.defaultSourcePath, help='path to the new stable.py, or a git revision')
+    parser.add_argument('--dat', action='store_true', help='show the offsets of the 32-bit .dat files instead of .datc64')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    lines = diffSpecifications(readSource(args.old), readSource(args.new), not args.dat)
+    tableCount = 0
+    for line in lines:
+        print(line)
+        tableCount += not line.startswith('\t')
+    print(f'{tableCount} tables changed ({(time.perf_counter() - start) * 1000:.0f}ms)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import sys
+import tracemalloc
+import types
+
+import specification
+
+# Measures the memory of the loaded specification against the same data in plain objects with a per-instance
+# __dict__ that keep the strings as loaded, the representation before Field/File used __slots__ and interned strings.
+# Usage: python measureSpecificationMemory.py [path/to/stable.py]
+
+fieldAttributes = specification.Field.__slots__
+
+def buildDictSpecification(data):
+    return {fileName: types.SimpleNamespace(
+            fields=tuple(types.SimpleNamespace(**{attribute: value for attribute, value in zip(fieldAttributes, field)}) for field in fields),
+            virtual_fields={name: types.SimpleNamespace(name=name, fields=tuple(virtualFields), zip=zip) for name, virtualFields, zip in virtualFieldData})
+        for fileName, fields, virtualFieldData in data}
+
+def measure(build, sourcePath, sourceHash):
+    # everything that stays allocated after loading the cache and building the specification from it
+    tracemalloc.start()
+    data = specification.loadCache(specification.getCachePath(sourcePath), sourceHash)
+    result = build(data)
+    del data
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def main():
+    sourcePath = sys.argv[1] if len(sys.argv) > 1 else specification.defaultSourcePath
+    # both are built from the same cached tuples, so only the representation differs
+    specification.loadSpecification(sourcePath)
+    with open(sourcePath, 'rb') as f:
+        sourceHash = specification.getSourceHash(f.read())
+
+    dictSpecification, dictSize = measure(buildDictSpecification, sourcePath, sourceHash)
+    slotsSpecification, slotsSize = measure(specification.fromCacheData, sourcePath, sourceHash)
+    fieldCount = sum(len(file.fields) for file in slotsSpecification.values())
+    print(f'{len(slotsSpecification)} files, {fieldCount} fields')
+    print(f'{"__dict__ objects":<20} {dictSize / 1024:10.1f} KB {dictSize / fieldCount:8.1f} B/field')
+    print(f'{"__slots__ objects":<20} {slotsSize / 1024:10.1f} KB {slotsSize / fieldCount:8.1f} B/field')
+    print(f'{"saved":<20} {(dictSize - slotsSize) / 1024:10.1f} KB {100 * (dictSize - slotsSize) / dictSize:7.1f} %')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+
+import specification
+
+# Compiles the row layout of every table in stable.py: the byte offset and width of each column and the row width,
+# for both the 32-bit .dat and the 64-bit .datc64 files. Readers can then seek straight to a column and check the
+# row width of a file before reading it, instead of scanning for the magic number like DatFile.FindRecordLength.
+# Usage: python recordLayout.py [--output layouts.json] [--source path/to/stable.py]
+
+# separates the rows from the data section
+magicNumber = b'\xbb' * 8
+
+fixedWidths = {
+    'bool': 1,
+    'byte': 1,
+    'short': 2,
+    'ushort': 2,
+    'int': 4,
+    'uint': 4,
+    'float': 4,
+    'long': 8,
+    'ulong': 8,
+    'int128': 16,
+    'uint128': 16,
+}
+
+refPrefix = 'ref|'
+listPrefix = 'ref|list|'
+
+def getValueWidth(type, x64, foreignKey=False):
+    # width of a value of this type where it's stored: in the row, or in the data section for list items.
+    # None for strings, they're null terminated.
+    # A foreign key (a ulong with key=) is a row index in .dat files, but a 16 byte uint128 in .datc64 files.
+    if type == 'ulong' and foreignKey and x64:
+        return 16
+    if type in fixedWidths:
+        return fixedWidths[type]
+    if type.startswith('byte[') and type.endswith(']'):
+        return int(type[5:-1])
+    if type == 'ref|generic':
+        return 8 if x64 else 4
+    if type.startswith(listPrefix):
+        # count and offset
+        return 16 if x64 else 8
+    if type.startswith(refPrefix):
+        return 8 if x64 else 4
+    if type == 'string':
+        return None
+    raise ValueError(f'Unknown type {type!r}')
+
+def getColumnWidth(field, x64):
+    return getValueWidth(field.type, x64, field.key is not None)
+
+def getItemWidth(field, x64):
+    # width of what a ref| or ref|list| column points to in the data section, None for strings
+    if field.type.startswith(listPrefix):
+        return getValueWidth(field.type[len(listPrefix):], x64, field.key is not None)
+    if field.type.startswith(refPrefix) and field.type != 'ref|generic':
+        return getValueWidth(field.type[len(refPrefix):], x64, field.key is not None)
+    return None
+
+class Column:
+    __slots__ = ('field', 'offset', 'width')
+
+    def __init__(self, field, offset, width):
+        self.field = field
+        self.offset = offset
+        self.width = width
+
+    def __repr__(self):
+        return f'Column({self.field.name!r}, {self.field.type!r}, offset={self.offset}, width={self.width})'
+
+class TableLayout:
+    __slots__ = ('fileName', 'x64', 'columns', 'rowWidth', 'columnIndex')
+
+    def __init__(self, fileName, x64, columns):
+        self.fileName = fileName
+        self.x64 = x64
+        self.columns = tuple(columns)
+        self.rowWidth = sum(column.width for column in self.columns)
+        # first column of each name, see specification.File
+        self.columnIndex = {}
+        for column in self.columns:
+            self.columnIndex.setdefault(column.field.name, column)
+
+    def getColumn(self, name):
+        return self.columnIndex[name]
+
+def compileLayout(fileName, file, x64):
+    columns = []
+    offset = 0
+    for field in file.fields:
+        width = getColumnWidth(field, x64)
+        columns.append(Column(field, offset, width))
+        offset += width
+    return TableLayout(getDatFileName(fileName, x64), x64, columns)
+
+def getDatFileName(fileName, x64):
+    # stable.py names the tables Name.dat, the 64-bit files are Name.datc64
+    baseName = fileName.rsplit('.', 1)[0]
+    return baseName + ('.datc64' if x64 else '.dat')
+
+def compileLayouts(specification):
+    # {'Name.dat': TableLayout, 'Name.datc64': TableLayout} for every table
+    layouts = {}
+    for fileName, file in specification.items():
+        for x64 in (False, True):
+            layout = compileLayout(fileName, file, x64)
+            layouts[layout.fileName] = layout
+    return layouts
+
+def findRowWidth(data):
+    # measures the row width of a .dat/.datc64 file from its contents, like DatFile.FindRecordLength:
+    # the magic number directly follows the rows, so it's at 4 + rowCount * rowWidth. None if it's not found.
+    rowCount = int.from_bytes(data[:4], 'little')
+    pos = data.find(magicNumber, 4)
+    if rowCount == 0:
+        return 0 if pos == 4 else None
+    while pos != -1:
+        if (pos - 4) % rowCount == 0:
+            return (pos - 4) // rowCount
+        pos = data.find(magicNumber, pos + 1)
+    return None
+
+def toJson(layouts):
+    return {fileName: {
+            'rowWidth': layout.rowWidth,
+            'columns': [{'name': column.field.name, 'type': column.field.type, 'offset': column.offset, 'width': column.width} for column in layout.columns],
+        } for fileName, layout in layouts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiles the row layout of every table in stable.py.')
+    parser.add_argument('--source', default=specification.defaultSourcePath, help='path to stable.py')
+    parser.add_argument('--output', help='write the layout index to this json file, prints a summary otherwise')
+    args = parser.parse_args()
+
+    layouts = compileLayouts(specification.loadSpecification(args.source))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(toJson(layouts), f, indent='\t')
+    else:
+        for fileName, layout in layouts.items():
+            sys.stdout.write(f'{fileName:<50} {len(layout.columns):4} columns {layout.rowWidth:6} bytes\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import os
+import re
+
+import specification
+
+# The foreign keys (key=) of stable.py as a graph between tables, to plan which tables a pipeline has to decode.
+# Tables are the stable.py names (Name.dat), the .datc64 files the updater reads are mapped onto them.
+# Usage: python referenceGraph.py [--export stats.json] [--cycles] [--order]
+
+defaultProgramPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'PoEAssetUpdater', 'Program.cs')
+
+class ReferenceGraph:
+    def __init__(self, spec):
+        # references: {table: {referenced table: [field names]}}, referencedBy is the reverse.
+        # Keys to tables stable.py doesn't define are kept apart in unresolved: [(table, field name, key)].
+        self.tables = list(spec)
+        self.references = {fileName: {} for fileName in spec}
+        self.referencedBy = {fileName: {} for fileName in spec}
+        self.unresolved = []
+        for fileName, file in spec.items():
+            for field in file.fields:
+                if field.key is None:
+                    continue
+                if field.key not in self.references:
+                    self.unresolved.append((fileName, field.name, field.key))
+                    continue
+                self.references[fileName].setdefault(field.key, []).append(field.name)
+                self.referencedBy[field.key].setdefault(fileName, []).append(field.name)
+
+    def getComponents(self):
+        # strongly connected components (Tarjan's algorithm, iterative), each component comes after all
+        # components it references, so this is also a load order of the components
+        index = {}
+        lowLink = {}
+        onStack = set()
+        stack = []
+        components = []
+        for root in self.tables:
+            if root in index:
+                continue
+            work = [(root, iter(self.references[root]))]
+            index[root] = lowLink[root] = len(index)
+            stack.append(root)
+            onStack.add(root)
+            while work:
+                table, referencedTables = work[-1]
+                for referencedTable in referencedTables:
+                    if referencedTable not in index:
+                        index[referencedTable] = lowLink[referencedTable] = len(index)
+                        stack.append(referencedTable)
+                        onStack.add(referencedTable)
+                        work.append((referencedTable, iter(self.references[referencedTable])))
+                        break
+                    if referencedTable in onStack:
+                        lowLink[table] = min(lowLink[table], index[referencedTable])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowLink[parent] = min(lowLink[parent], lowLink[table])
+                    if lowLink[table] == index[table]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            onStack.discard(member)
+                            component.append(member)
+                            if member == table:
+                                break
+                        components.append(sorted(component))
+        return components
+
+    def getCycles(self):
+        # groups of tables that reference each other, a table that only references itself isn't a cycle
+        return [component for component in self.getComponents() if len(component) > 1]
+
+    def getSelfReferences(self):
+        return [table for table in self.tables if table in self.references[table]]
+
+    def getLoadOrder(self, tables=None):
+        # tables in an order where every table comes after the tables it references, except within a cycle
+        # tables: only order these, e.g. the result of getReachable
+        return [table for component in self.getComponents() for table in component if tables is None or table in tables]
+
+    def getReachable(self, roots):
+        # the roots and every table they reference, directly or indirectly
+        reachable = set()
+        pending = [root for root in roots if root in self.references]
+        while pending:
+            table = pending.pop()
+            if table in reachable:
+                continue
+            reachable.add(table)
+            pending.extend(self.references[table])
+        return reachable
+
+def findExportTables(programPath=defaultProgramPath):
+    # {'stats.json': ['Stats.dat', ...]}: the tables each Export method of Program.cs reads, found from the
+    # "name.json" and "Name.datc64" literals in its body
+    with open(programPath, 'r', encoding='utf-8-sig') as f:
+        source = f.read()
+    methodStarts = [match.start() for match in re.finditer(r'^\t\t(?:private|public|internal) static ', source, re.MULTILINE)] + [len(source)]
+    exportTables = {}
+    for start, end in zip(methodStarts, methodStarts[1:]):
+        body = source[start:end]
+        if not re.match(r'\t\t\w+ static void Export', body):
+            continue
+        tables = []
+        for baseName in re.findall(r'"(\w+)\.(?:dat|datc64)"', body):
+            tableName = baseName + '.dat'
+            if tableName not in tables:
+                tables.append(tableName)
+        for exportName in re.findall(r'"([\w-]+\.json)"', body):
+            exportTables.setdefault(exportName, [])
+            exportTables[exportName] += [table for table in tables if table not in exportTables[exportName]]
+    return exportTables
+
+def main():
+    parser = argparse.ArgumentParser(description='Foreign key graph of the stable.py tables.')
+    parser.add_argument('--source', default=specification.defaultSourcePath, help='path to stable.py')
+    parser.add_argument('--program', default=defaultProgramPath, help='path to Program.cs, to find the tables of an export')
+    parser.add_argument('--export', action='append', help='list the tables needed for this export (e.g. stats.json), can be repeated')
+    parser.add_argument('--cycles', action='store_true', help='list the tables that reference each other')
+    parser.add_argument('--order', action='store_true', help='list all tables in load order')
+    args = parser.parse_args()
+
+    graph = ReferenceGraph(specification.loadSpecification(args.source))
+    edgeCount = sum(len(fieldNames) for references in graph.references.values() for fieldNames in references.values())
+    print(f'{len(graph.tables)} tables, {edgeCount} references, {len(graph.getCycles())} cycles, {len(graph.getSelfReferences())} self references, {len(graph.unresolved)} unresolved')
+    for table, fieldName, key in graph.unresolved:
+        print(f'Unresolved: {table}.{fieldName} -> {key}')
+    if args.cycles:
+        for cycle in graph.getCycles():
+            print('Cycle: ' + ', '.join(cycle))
+    if args.order:
+        for table in graph.getLoadOrder():
+            print(table)
+    if args.export:
+        exportTables = findExportTables(args.program)
+        for exportName in args.export:
+            if exportName not in exportTables:
+                print(f'Unknown export {exportName}, known exports: {", ".join(sorted(exportTables))}')
+                continue
+            roots = exportTables[exportName]
+            tables = graph.getLoadOrder(graph.getReachable(roots))
+            print(f'{exportName}: reads {len(roots)} tables, {len(tables)} tables with their references (of {len(graph.tables)})')
+            for table in tables:
+                print(f'\t{table}' + (' (read directly)' if table in roots else ''))
+            for table in roots:
+                if table not in graph.references:
+                    print(f'\t{table} (read directly, not defined in stable.py)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import ast
+import collections.abc
+import hashlib
+import marshal
+import os
+import sys
+import time
+
+# Reads the PyPoE .dat specification (Resources/stable.py) without PyPoE: the source is parsed with ast instead of
+# imported, and the result is cached in a compact marshal file next to it (stable.spec) that is keyed by the hash of
+# the source, so later loads skip the parsing and only rebuild when stable.py changes.
+# With lazy=True only an index of where each file is defined is built up front, see LazySpecification.
+
+defaultSourcePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Resources', 'stable.py')
+
+cacheVersion = 1
+
+class Field:
+    # mirrors PyPoE.poe.file.specification.fields.Field, with the same keyword names and defaults as stable.py uses.
+    # There are thousands of fields, so they use __slots__ and the strings that repeat across them are interned.
+    __slots__ = ('name', 'type', 'key', 'key_id', 'key_offset', 'enum', 'unique', 'file_path', 'file_ext', 'display', 'display_type', 'description')
+
+    def __init__(self, name, type, key=None, key_id=None, key_offset=0, enum=None, unique=False, file_path=False, file_ext=None, display=None, display_type='{0}', description=None):
+        self.name = sys.intern(name)
+        self.type = sys.intern(type)
+        self.key = sys.intern(key) if key is not None else None
+        self.key_id = key_id
+        self.key_offset = key_offset
+        self.enum = sys.intern(enum) if enum is not None else None
+        self.unique = unique
+        self.file_path = file_path
+        self.file_ext = sys.intern(file_ext) if file_ext is not None else None
+        self.display = display
+        self.display_type = display_type
+        self.description = description
+
+    def __repr__(self):
+        return f'Field(name={self.name!r}, type={self.type!r})'
+
+class VirtualField:
+    __slots__ = ('name', 'fields', 'zip')
+
+    def __init__(self, name, fields, zip=False):
+        self.name = name
+        self.fields = tuple(fields)
+        self.zip = zip
+
+    def __repr__(self):
+        return f'VirtualField(name={self.name!r}, fields={self.fields!r})'
+
+class File:
+    # fields are the columns in row order. Unlike PyPoE they're not keyed by name, because a few tables in stable.py
+    # define a name twice and every column is needed to lay out a row. virtual_fields is {name: VirtualField}.
+    __slots__ = ('fields', 'virtual_fields')
+
+    def __init__(self, fields=(), virtual_fields=()):
+        self.fields = tuple(fields)
+        self.virtual_fields = {field.name: field for field in virtual_fields}
+
+    def getField(self, name):
+        # the first column with this name, or None
+        for field in self.fields:
+            if field.name == name:
+                return field
+        return None
+
+    def __repr__(self):
+        return f'File(fields={[field.name for field in self.fields]!r})'
+
+class Specification(dict):
+    # {'Name.dat': File}
+    pass
+
+# the names stable.py gets from `from PyPoE.poe.file.specification.fields import *`
+constructors = {
+    'Specification': Specification,
+    'File': File,
+    'Field': Field,
+    'VirtualField': VirtualField,
+}
+
+def evaluate(node):
+    # evaluates the literals and constructor calls of the specification expression, nothing else is allowed
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in constructors:
+            raise ValueError(f'Unexpected call on line {node.lineno} of the specification')
+        args = [evaluate(arg) for arg in node.args]
+        kwargs = {keyword.arg: evaluate(keyword.value) for keyword in node.keywords}
+        return constructors[node.func.id](*args, **kwargs)
+    if isinstance(node, ast.Dict):
+        return {evaluate(key): evaluate(value) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, ast.Tuple):
+        return tuple(evaluate(item) for item in node.elts)
+    if isinstance(node, ast.List):
+        return [evaluate(item) for item in node.elts]
+    return ast.literal_eval(node)
+
+def parseSpecification(source):
+    # source: the text of stable.py, returns the Specification assigned to `specification`
+    for statement in ast.parse(source).body:
+        if isinstance(statement, ast.Assign) and any(isinstance(target, ast.Name) and target.id == 'specification' for target in statement.targets):
+            return evaluate(statement.value)
+    raise ValueError('No specification found')
+
+# follows the name of each file entry of the specification dict
+fileEntryMarker = b"': File("
+
+def findEntries(source):
+    # {'Name.dat': (start, end)}: the byte range of each file entry in the source of stable.py, without parsing it
+    starts = []
+    pos = source.find(fileEntryMarker)
+    while pos != -1:
+        start = source.rindex(b"'", 0, pos)
+        starts.append((source[start + 1:pos].decode('utf-8'), start))
+        pos = source.find(fileEntryMarker, pos + len(fileEntryMarker))
+    # the last entry ends at the closing bracket of the dict
+    end = source.rindex(b'}')
+    return {fileName: (start, starts[idx + 1][1] if idx + 1 < len(starts) else end) for idx, (fileName, start) in enumerate(starts)}
+
+def parseEntry(fileName, entry):
+    # entry: the text of one file entry as found by findEntries
+    return evaluate(ast.parse('{' + entry + '}', mode='eval').body)[fileName]
+
+class LazySpecification(collections.abc.Mapping):
+    # {'Name.dat': File} that only holds the byte range of each entry in stable.py, and parses an entry the first time
+    # it's requested. Startup time and memory then depend on the number of files used instead of the number defined.
+    def __init__(self, sourcePath, source=None):
+        self.sourcePath = sourcePath
+        if source is None:
+            with open(sourcePath, 'rb') as f:
+                source = f.read()
+        self.offsets = findEntries(source)
+        self.files = {}
+
+    def __getitem__(self, fileName):
+        file = self.files.get(fileName)
+        if file is None:
+            start, end = self.offsets[fileName]
+            with open(self.sourcePath, 'rb') as f:
+                f.seek(start)
+                entry = f.read(end - start).decode('utf-8')
+            file = parseEntry(fileName, entry)
+            self.files[fileName] = file
+        return file
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, fileName):
+        return fileName in self.offsets
+
+def toCacheData(specification):
+    # plain tuples, so the cache can be written with marshal
+    return [(fileName,
+            tuple((field.name, field.type, field.key, field.key_id, field.key_offset, field.enum, field.unique, field.file_path, field.file_ext, field.display, field.display_type, field.description) for field in file.fields),
+            tuple((field.name, field.fields, field.zip) for field in file.virtual_fields.values()))
+        for fileName, file in specification.items()]
+
+def fromCacheData(data):
+    return Specification((fileName, File([Field(*field) for field in fields], [VirtualField(*field) for field in virtualFields])) for fileName, fields, virtualFields in data)
+
+def getSourceHash(source):
+    return hashlib.blake2b(source, digest_size=16).digest()
+
+def getCachePath(sourcePath):
+    return os.path.splitext(sourcePath)[0] + '.spec'
+
+def loadCache(cachePath, sourceHash):
+    # None when there's no cache, or it's from another version or another source
+    try:
+        with open(cachePath, 'rb') as f:
+            version, cachedSourceHash, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != cacheVersion or cachedSourceHash != sourceHash:
+        return None
+    return data
+
+def saveCache(cachePath, sourceHash, data):
+    # written to a temporary file first, so a concurrent load never sees half a cache
+    tempPath = cachePath + '.tmp'
+    with open(tempPath, 'wb') as f:
+        f.write(marshal.dumps((cacheVersion, sourceHash, data)))
+    os.replace(tempPath, cachePath)
+
+def loadSpecification(sourcePath=defaultSourcePath, lazy=False):
+    # lazy: return a LazySpecification, for tools that only need a few files. It doesn't use the cache.
+    with open(sourcePath, 'rb') as f:
+        source = f.read()
+    if lazy:
+        return LazySpecification(sourcePath, source)
+    sourceHash = getSourceHash(source)
+    cachePath = getCachePath(sourcePath)
+    data = loadCache(cachePath, sourceHash)
+    if data is None:
+        data = toCacheData(parseSpecification(source))
+        try:
+            saveCache(cachePath, sourceHash, data)
+        except OSError:
+            # a read-only checkout still works, it just parses every time
+            pass
+    return fromCacheData(data)
+
+if __name__ == '__main__':
+    # compiles the cache, e.g. as a build step: python specification.py [path/to/stable.py]
+    sourcePath = sys.argv[1] if len(sys.argv) > 1 else defaultSourcePath
+    start = time.perf_counter()
+    specification = loadSpecification(sourcePath)
+    print(f'{getCachePath(sourcePath)}: {len(specification)} files, {sum(len(file.fields) for file in specification.values())} fields in {(time.perf_counter() - start) * 1000:.1f}ms')
@@ -0,0 +1,54 @@
+import random
+import struct
+
+import recordLayout
+
+# Builds .dat/.datc64 file contents that match a recordLayout.TableLayout, filled with random values, strings and
+# lists. Used by the benchmarks when no extracted game files are at hand.
+
+def buildTable(layout, rowCount, seed=0, referencedRowCount=1000):
+    rng = random.Random(seed)
+    pointerFormat = '<Q' if layout.x64 else '<I'
+    # the data section starts with the magic number, offsets are relative to its start
+    dataSection = bytearray(recordLayout.magicNumber)
+    strings = {}
+
+    def addString(string):
+        offset = strings.get(string)
+        if offset is None:
+            offset = len(dataSection)
+            dataSection.extend(string.encode('utf-16-le') + b'\0\0\0\0')
+            strings[string] = offset
+        return offset
+
+    def buildValue(type, width, foreignKey, rowIdx, column):
+        if type == 'ref|string':
+            return struct.pack(pointerFormat, addString(f'{column.field.name}{rowIdx}'))
+        if type.startswith(recordLayout.listPrefix):
+            itemType = type[len(recordLayout.listPrefix):]
+            itemWidth = recordLayout.getValueWidth(itemType, layout.x64, foreignKey)
+            items = b''.join(buildValue(itemType, itemWidth, foreignKey, rowIdx * 4 + idx, column) for idx in range(rng.randint(0, 3)))
+            offset = len(dataSection)
+            dataSection.extend(items)
+            return struct.pack('<QQ' if layout.x64 else '<II', len(items) // itemWidth, offset)
+        if type == 'ref|generic':
+            return struct.pack(pointerFormat, rng.randrange(referencedRowCount))
+        if type.startswith(recordLayout.refPrefix):
+            itemType = type[len(recordLayout.refPrefix):]
+            offset = len(dataSection)
+            dataSection.extend(buildValue(itemType, recordLayout.getValueWidth(itemType, layout.x64), False, rowIdx, column))
+            return struct.pack(pointerFormat, offset)
+        if foreignKey:
+            # the row index, in the first half of a .datc64 key
+            return rng.randrange(referencedRowCount).to_bytes(width, 'little')
+        if type == 'bool':
+            return bytes([rng.random() < 0.5])
+        if type == 'float':
+            return struct.pack('<f', rng.random())
+        return rng.getrandbits(width * 8).to_bytes(width, 'little')
+
+    rows = bytearray(rowCount.to_bytes(4, 'little'))
+    for rowIdx in range(rowCount):
+        for column in layout.columns:
+            rows.extend(buildValue(column.field.type, column.width, column.field.key is not None, rowIdx, column))
+    return bytes(rows + dataSection)
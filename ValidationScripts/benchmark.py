@@ -0,0 +1,118 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import validateAll
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Runs every validator on each fixture directory (see generateFixtures.py) in its own process and records its wall
+# time, peak RSS and findings/sec. Arguments it doesn't know (e.g. --stream or --jobs 4) are passed to the validators.
+# On Windows the peak RSS needs psutil (pip install psutil), it's left out without it.
+# Usage: python benchmark.py fixtures --save results.json, and later --baseline results.json to compare with it.
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+def getFixtureDirs(fixturesDir):
+    # the scale directories in size order, or the directory itself if it contains the files
+    scaleDirs = [path for path in glob.glob(os.path.join(fixturesDir, '*x')) if os.path.isdir(path)]
+    if not scaleDirs:
+        return [fixturesDir]
+    return sorted(scaleDirs, key=lambda path: int(os.path.basename(path)[:-1]) if os.path.basename(path)[:-1].isdigit() else 0)
+
+def countFindings(fixtureDir):
+    findings = 0
+    for path in glob.glob(os.path.join(fixtureDir, 'validate-*.jsonl')):
+        with open(path, 'rb') as f:
+            findings += sum(1 for _ in f)
+    return findings
+
+def runProcess(args, cwd, env):
+    # (exit code, peak RSS in MB or None when it can't be measured on this platform)
+    if hasattr(os, 'wait4'):
+        # linux and macOS: the resource usage of just this process (and the workers it waited for)
+        process = subprocess.Popen(args, cwd=cwd, env=env)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in KB on linux and in bytes on macOS
+        return process.returncode, usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    if psutil is None:
+        return subprocess.run(args, cwd=cwd, env=env).returncode, None
+    # windows: the peak working set, polled as it can't be read once the process is gone
+    process = subprocess.Popen(args, cwd=cwd, env=env)
+    peakRss = 0
+    try:
+        processInfo = psutil.Process(process.pid)
+        while process.poll() is None:
+            peakRss = max(peakRss, processInfo.memory_info().peak_wset)
+            time.sleep(0.05)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    return process.wait(), peakRss / (1024 * 1024) if peakRss else None
+
+def runValidator(fixtureDir, moduleName, validatorArgs):
+    for path in glob.glob(os.path.join(fixtureDir, 'validate-*.jsonl')):
+        os.remove(path)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [scriptDir, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    exitCode, peakRssMB = runProcess([sys.executable, '-m', moduleName, '--quiet'] + validatorArgs, fixtureDir, env)
+    seconds = time.perf_counter() - start
+    if exitCode != 0:
+        raise RuntimeError(f'{moduleName} failed in {fixtureDir} with exit code {exitCode}')
+    findings = countFindings(fixtureDir)
+    return {
+        'seconds': seconds,
+        'peakRssMB': peakRssMB,
+        'findings': findings,
+        'findingsPerSecond': findings / seconds if seconds > 0 else 0,
+    }
+
+def findValidators(fixtureDir, stream):
+    cwd = os.getcwd()
+    os.chdir(fixtureDir)
+    try:
+        return [moduleName for moduleNames in validateAll.findApplicableValidators(stream).values() for moduleName in moduleNames]
+    finally:
+        os.chdir(cwd)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the validators on generated fixtures.')
+    parser.add_argument('fixturesDir', nargs='?', default='fixtures')
+    parser.add_argument('--validators', help='comma separated validator modules, defaults to all applicable ones')
+    parser.add_argument('--save', help='write the results to this json file')
+    parser.add_argument('--baseline', help='results json of an earlier run to compare with')
+    args, validatorArgs = parser.parse_known_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f'{"fixture":<12} {"validator":<32} {"time":>9} {"peak rss":>10} {"findings":>9} {"findings/s":>11} {"vs baseline":>12}')
+    for fixtureDir in getFixtureDirs(args.fixturesDir):
+        fixtureName = os.path.basename(os.path.normpath(fixtureDir))
+        moduleNames = args.validators.split(',') if args.validators else findValidators(fixtureDir, '--stream' in validatorArgs)
+        for moduleName in moduleNames:
+            result = runValidator(fixtureDir, moduleName, validatorArgs)
+            results[f'{fixtureName}/{moduleName}'] = result
+            comparison = ''
+            baselineResult = baseline.get(f'{fixtureName}/{moduleName}')
+            if baselineResult is not None:
+                comparison = f'{result["seconds"] / baselineResult["seconds"]:.2f}x time'
+            peakRss = f'{result["peakRssMB"]:8.0f}MB' if result['peakRssMB'] is not None else '-'
+            print(f'{fixtureName:<12} {moduleName:<32} {result["seconds"]:8.2f}s {peakRss:>10} {result["findings"]:>9} {result["findingsPerSecond"]:>11.0f} {comparison:>12}', flush=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent='\t')
+
+if __name__ == '__main__':
+    main()
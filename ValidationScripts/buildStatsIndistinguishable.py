@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import diffEngine
+import regexCache
+import validationCommon
+import validateStatsIndistinguishable
+from validateIdenticalStats import getDescriptions
+
+# Rebuilds the indistinguishableStats of stats-indistinguishable.json from the English texts of stats.json, like
+# AddTradeStatData in Program.cs does while exporting, and compares it with the existing file.
+# AddTradeStatData tries the regex of every description seen so far on each new description. Here the descriptions
+# are indexed by their whitespace and literal words, so a new description is only tried against the few that have
+# the same literal words where they don't have a placeholder; the first match is still the one the scan would find.
+# Only stats that have an id are used, the exporter also leaves out stats whose candidate stat descriptions differ
+# in being local, which stats.json doesn't tell.
+# Usage: python buildStatsIndistinguishable.py [--stats stats.json] [--compare stats-indistinguishable.json]
+# [--output path] [--benchmark] [--labels implicit,crafted] [--regex-cache regexes.json]
+
+placeholder = '#'
+# regex characters a description may contain that GetStatDescriptionRegex doesn't escape. A word with an anchor isn't
+# compared as a literal, the others can match whitespace (. [ \ and quantifiers) or split the whole regex (|), so a
+# description with one of those isn't indexed at all.
+regexAnchors = set('^$')
+unindexedChars = set('.[\\|*?{')
+
+# descriptions the index has to group like the pairwise scan, checked by --benchmark
+edgeCases = [
+    ['#% of Damage.Taken', '#% of Damage Taken'],
+    ['Foo|Bar baz', 'Foo'],
+    ['# to [Fire] Resistance', '# to F Resistance'],
+    ['Fire\\sDamage', 'Fire Damage'],
+    ['#% increased Lifes? Regeneration', '#% increased Life Regeneration'],
+    ['^Adds # Damage', 'Adds # Damage'],
+]
+
+def getDescription(regex, suffix):
+    # the description a stats.json text regex was built from, see StatDescription.StatLine.GetStatDescriptionRegex.
+    # +# comes back as #, which AddTradeStatData treats the same.
+    lines = validationCommon.getStatDescription(regex).split('\n')
+    if suffix:
+        lines = [line[:-len(suffix)] if line.endswith(suffix) else line for line in lines]
+    return '\n'.join(lines)
+
+def splitDescription(desc):
+    # (separators, words): a regex placeholder never matches whitespace, so a description only matches the regex of
+    # another with the same whitespace
+    parts = re.split(r'(\s+)', desc)
+    return tuple(parts[1::2]), tuple(parts[::2])
+
+class TradeStatData:
+    # {description: [trade ids]} as built by AddTradeStatData, with an index over the descriptions
+    def __init__(self):
+        self.groups = {}
+        self.descs = []
+        self.regexes = []
+        # {separators: {placeholder positions: {literal words: [desc index]}}}
+        self.index = {}
+        # indexes of the descriptions with unindexedChars, they're tried on everything
+        self.unindexed = []
+
+    def findGroup(self, desc):
+        # the first description (in insertion order) that is equal to desc or whose regex matches it, or None
+        separators, words = splitDescription(desc)
+        candidates = list(self.unindexed)
+        for positions, keys in self.index.get(separators, {}).items():
+            candidates += keys.get(tuple(word for position, word in enumerate(words) if position not in positions), ())
+        for descIdx in sorted(candidates):
+            if self.descs[descIdx] == desc or (self.regexes[descIdx] is not None and self.regexes[descIdx].match(desc)):
+                return self.descs[descIdx]
+        return None
+
+    def add(self, desc, tradeId):
+        existingDesc = self.findGroup(desc)
+        if existingDesc is not None:
+            tradeIds = self.groups[existingDesc]
+            if tradeId not in tradeIds:
+                tradeIds.append(tradeId)
+            return
+        self.groups[desc] = [tradeId]
+        descIdx = len(self.descs)
+        self.descs.append(desc)
+        self.regexes.append(regexCache.compile(validationCommon.getStatDescriptionRegex(desc)))
+        if any(c in unindexedChars for c in desc):
+            self.unindexed.append(descIdx)
+            return
+        separators, words = splitDescription(desc)
+        positions = frozenset(position for position, word in enumerate(words) if placeholder in word or any(c in regexAnchors for c in word))
+        key = tuple(word for position, word in enumerate(words) if position not in positions)
+        self.index.setdefault(separators, {}).setdefault(positions, {}).setdefault(key, []).append(descIdx)
+
+class PairwiseTradeStatData:
+    # a direct port of AddTradeStatData, to compare with
+    def __init__(self):
+        self.groups = {}
+
+    def add(self, desc, tradeId):
+        for existingDesc, tradeIds in self.groups.items():
+            if existingDesc == desc or re.match(validationCommon.getStatDescriptionRegex(existingDesc), desc):
+                if tradeId not in tradeIds:
+                    tradeIds.append(tradeId)
+                return
+        self.groups[desc] = [tradeId]
+
+def buildIndistinguishableStats(stats, tradeStatDataType=TradeStatData):
+    # {label: {trade id: [indistinguishable trade ids]}}, written like the stats-indistinguishable.json export
+    indistinguishableStats = {}
+    for label, labelStats in stats.items():
+        tradeStatData = tradeStatDataType()
+        suffix = validationCommon.labelSuffixes.get(label)
+        for tradeId, stat in labelStats.items():
+            if 'id' not in stat or '1' not in stat.get('text', {}):
+                continue
+            for regex in getDescriptions(stat['text']['1']):
+                tradeStatData.add(getDescription(regex, suffix), tradeId)
+        labelIndistinguishable = {}
+        for tradeIds in tradeStatData.groups.values():
+            if len(tradeIds) < 2:
+                continue
+            for tradeId in tradeIds:
+                if tradeId not in labelIndistinguishable:
+                    labelIndistinguishable[tradeId] = [otherTradeId for otherTradeId in tradeIds if otherTradeId != tradeId]
+        indistinguishableStats[label] = labelIndistinguishable
+    return indistinguishableStats
+
+def checkEdgeCases():
+    # the descriptions of edgeCases that the index groups differently than the pairwise scan
+    failed = []
+    for descs in edgeCases:
+        tradeStatData = TradeStatData()
+        pairwiseTradeStatData = PairwiseTradeStatData()
+        for tradeIdx, desc in enumerate(descs):
+            tradeStatData.add(desc, str(tradeIdx))
+            pairwiseTradeStatData.add(desc, str(tradeIdx))
+        if tradeStatData.groups != pairwiseTradeStatData.groups:
+            failed.append(descs)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuilds stats-indistinguishable.json from stats.json.')
+    parser.add_argument('--stats', default='stats.json')
+    parser.add_argument('--compare', default='stats-indistinguishable.json', help='the file to compare with, if it exists')
+    parser.add_argument('--output', help='write the rebuilt file here')
+    parser.add_argument('--benchmark', action='store_true', help='also time the pairwise scan of AddTradeStatData')
+    parser.add_argument('--labels', help='comma separated stat types to build, defaults to all (the pairwise scan takes minutes on all of them)')
+    parser.add_argument('--regex-cache', help='compile the regexes listed in this file up front, and save the most used ones to it')
+    args = parser.parse_args()
+
+    if args.regex_cache:
+        regexCache.defaultCache.load(args.regex_cache)
+    stats = validationCommon.loadJson(args.stats)
+    if args.labels:
+        stats = {label: stats[label] for label in args.labels.split(',') if label in stats}
+    start = time.perf_counter()
+    indistinguishableStats = buildIndistinguishableStats(stats)
+    seconds = time.perf_counter() - start
+    print(f'indexed:  {seconds:8.2f}s, {sum(map(len, indistinguishableStats.values()))} indistinguishable stats')
+    print(regexCache.defaultCache.getSummary())
+    if args.regex_cache:
+        regexCache.defaultCache.save(args.regex_cache)
+    if args.benchmark:
+        failedEdgeCases = checkEdgeCases()
+        print(f'edge cases: {len(edgeCases) - len(failedEdgeCases)}/{len(edgeCases)} grouped like the pairwise scan')
+        for descs in failedEdgeCases:
+            print(f'  differs: {descs}')
+        start = time.perf_counter()
+        pairwiseIndistinguishableStats = buildIndistinguishableStats(stats, PairwiseTradeStatData)
+        pairwiseSeconds = time.perf_counter() - start
+        print(f'pairwise: {pairwiseSeconds:8.2f}s ({pairwiseSeconds / seconds:.0f}x)' + ('' if pairwiseIndistinguishableStats == indistinguishableStats else ', but the result differs'))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'indistinguishableStats': indistinguishableStats}, f, indent=2)
+    if os.path.exists(args.compare):
+        existing = validationCommon.loadJson(args.compare)['indistinguishableStats']
+        records = diffEngine.orderRecords(validateStatsIndistinguishable.diffStats(existing, indistinguishableStats))
+        for record in records:
+            print(f'{record.kind} {diffEngine.formatPath(record.path)}')
+        print(f'{len(records)} differences with {args.compare}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+MISSING = 'Missing'
+ADDED = 'Added'
+CHANGED = 'Changed'
+
+# kind: MISSING, ADDED or CHANGED
+# path: tuple of keys (str) and list indices (int) leading to the difference
+# old/new: the original and new value at the path (None when absent)
+# aspect/value: optional detail for handlers reporting more than a plain value change (e.g. a moved list entry)
+DiffRecord = namedtuple('DiffRecord', ['kind', 'path', 'old', 'new', 'aspect', 'value'], defaults=[None, None])
+
+def formatPath(path):
+    result = ''
+    for key in path:
+        if isinstance(key, int):
+            result += f'[{key}]'
+        elif result:
+            result += '.' + key
+        else:
+            result = key
+    return result
+
+def diffTrees(original, new, path=(), descend=None, handle=None, originalHashes=None, newHashes=None):
+    # Walks both decoded json trees once, in the original's key order, and returns the differences as DiffRecords.
+    # descend(path) decides whether two dicts at path are walked (default: always) or compared as a single value.
+    # handle(path, originalValue, newValue, append) may take over the comparison of two differing values by returning True.
+    # originalHashes/newHashes are optional {path: digest} subtree hashes (see subtreeHashes), used instead of comparing values.
+    records = []
+    append = records.append
+    useHashes = originalHashes is not None and newHashes is not None
+
+    def diffKey(originalValue, new, key, keyPath):
+        if key not in new:
+            append(DiffRecord(MISSING, keyPath, originalValue, None))
+            return
+        newValue = new[key]
+        # identical subtrees are skipped without walking them
+        originalHash = originalHashes.get(keyPath) if useHashes else None
+        if originalHash is not None and keyPath in newHashes:
+            if originalHash == newHashes[keyPath]:
+                return
+        elif originalValue is newValue or originalValue == newValue:
+            return
+        if handle is not None and handle(keyPath, originalValue, newValue, append):
+            return
+        if type(originalValue) is dict and type(newValue) is dict and (descend is None or descend(keyPath)):
+            walk(originalValue, newValue, keyPath)
+        else:
+            append(DiffRecord(CHANGED, keyPath, originalValue, newValue))
+
+    def walk(original, new, path):
+        # a key only in new is added right after the key before it in new, so the additions (which orderRecords
+        # keeps in walk order) are in the new file's order
+        addedKeys = {}
+        previousKey = None
+        for key in new:
+            if key in original:
+                previousKey = key
+            else:
+                addedKeys.setdefault(previousKey, []).append(key)
+        for key in addedKeys.get(None, ()):
+            append(DiffRecord(ADDED, path + (key,), None, new[key]))
+        for key, originalValue in original.items():
+            diffKey(originalValue, new, key, path + (key,))
+            for addedKey in addedKeys.get(key, ()):
+                append(DiffRecord(ADDED, path + (addedKey,), None, new[addedKey]))
+
+    if type(original) is dict and type(new) is dict:
+        walk(original, new, path)
+    elif original != new:
+        append(DiffRecord(CHANGED, path, original, new))
+    return records
+
+def orderRecords(records):
+    # removals and changes first, followed by the additions, each in walk order
+    return [record for record in records if record.kind != ADDED] + [record for record in records if record.kind == ADDED]
@@ -0,0 +1,135 @@
+import json
+import struct
+
+# Compact binary findings file:
+#   header: magic, version byte, source file name (string)
+#   record: kind (string), aspect (value), path element count (varint), path elements (values), old, new, value (values)
+# A string is a varint reference: 0 introduces a new string (varint byte length + utf-8) that gets the next id,
+# n > 0 refers to the string with id n - 1. Kinds, keys and repeated values are therefore stored only once.
+# A value is a tag byte followed by its data, see the *Tag constants.
+magic = b'PVFB'
+version = 1
+
+noneTag = 0
+stringTag = 1
+intTag = 2
+jsonTag = 3 # any other json value, stored as its json string
+
+def writeVarint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def readVarint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+class FindingsWriter:
+    def __init__(self, path, source):
+        self.file = open(path, 'wb')
+        self.strings = {}
+        out = bytearray(magic)
+        out.append(version)
+        self.writeString(out, source)
+        self.file.write(out)
+
+    def writeString(self, out, string):
+        stringId = self.strings.get(string)
+        if stringId is not None:
+            writeVarint(out, stringId + 1)
+            return
+        self.strings[string] = len(self.strings)
+        encoded = string.encode('utf-8')
+        writeVarint(out, 0)
+        writeVarint(out, len(encoded))
+        out += encoded
+
+    def writeValue(self, out, value):
+        if value is None:
+            out.append(noneTag)
+        elif type(value) is str:
+            out.append(stringTag)
+            self.writeString(out, value)
+        elif type(value) is int:
+            out.append(intTag)
+            # zigzag, so small negative numbers stay small
+            writeVarint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+        else:
+            out.append(jsonTag)
+            self.writeString(out, json.dumps(value, ensure_ascii=False))
+
+    def writeRecords(self, records):
+        out = bytearray()
+        for record in records:
+            self.writeString(out, record.kind)
+            self.writeValue(out, record.aspect)
+            writeVarint(out, len(record.path))
+            for key in record.path:
+                self.writeValue(out, key)
+            self.writeValue(out, record.old)
+            self.writeValue(out, record.new)
+            self.writeValue(out, record.value)
+        self.file.write(out)
+
+    def close(self):
+        self.file.close()
+
+def readFindings(path):
+    # yields every finding as a dict with the same keys as the .jsonl findings
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(magic)] != magic or data[len(magic)] != version:
+        raise ValueError(f'{path} is not a version {version} findings file')
+    strings = []
+
+    def readString(pos):
+        stringRef, pos = readVarint(data, pos)
+        if stringRef > 0:
+            return strings[stringRef - 1], pos
+        length, pos = readVarint(data, pos)
+        string = data[pos:pos + length].decode('utf-8')
+        strings.append(string)
+        return string, pos + length
+
+    def readValue(pos):
+        tag = data[pos]
+        pos += 1
+        if tag == noneTag:
+            return None, pos
+        elif tag == stringTag:
+            return readString(pos)
+        elif tag == intTag:
+            value, pos = readVarint(data, pos)
+            return (value >> 1 if not value & 1 else -((value + 1) >> 1)), pos
+        value, pos = readString(pos)
+        return json.loads(value), pos
+
+    source, pos = readString(len(magic) + 1)
+    while pos < len(data):
+        kind, pos = readString(pos)
+        aspect, pos = readValue(pos)
+        count, pos = readVarint(data, pos)
+        keyPath = []
+        for _ in range(count):
+            key, pos = readValue(pos)
+            keyPath.append(key)
+        old, pos = readValue(pos)
+        new, pos = readValue(pos)
+        value, pos = readValue(pos)
+        yield toFinding(kind, source, keyPath, old, new, aspect, value)
+
+def toFinding(kind, source, path, old, new, aspect=None, value=None):
+    finding = {'kind': kind, 'file': source, 'path': path, 'old': old, 'new': new}
+    if aspect is not None:
+        finding['aspect'] = aspect
+    if value is not None:
+        finding['value'] = value
+    return finding
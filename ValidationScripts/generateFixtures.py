@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import random
+
+import validationCommon
+
+# Generates synthetic stats.json, words.json and base-item-types-v2.json files (and their newFiles/ copies) in the
+# layout of the exported files, at multiples of their current size. The new copies differ from the originals by the
+# given rates of missing, added, renamed and reordered entries. Entries are written one at a time, so even the 100x
+# files are generated without holding them in memory.
+# Usage: python generateFixtures.py fixtures --scales 1,10 --missing 0.02, then run benchmark.py on fixtures/
+
+# roughly the number of entries of the current files
+statTypeSizes = {
+    'pseudo': 400,
+    'explicit': 6000,
+    'implicit': 1400,
+    'fractured': 1100,
+    'crafted': 300,
+    'enchant': 900,
+    'veiled': 40,
+    'monster': 300,
+    'delve': 50,
+    'ultimatum': 30,
+    'scourge': 700,
+    'crucible': 1100,
+    'sanctum': 200,
+    'necropolis': 300,
+}
+wordCount = 12000
+baseItemTypeCount = 9000
+
+# see Language.cs, simplified chinese isn't exported
+languages = ['1', '2', '3', '4', '5', '6', '7', '8', '10', '11']
+# languages written in another script, their words are mapped onto this unicode block
+languageScripts = {'3': 0x0410, '4': 0x0E01, '8': 0xAC00, '10': 0x4E00, '11': 0x3041}
+
+statFormats = [
+    '+# to {subject}',
+    '#% increased {subject}',
+    '#% reduced {subject}',
+    '#% more {subject}',
+    '#% less {subject}',
+    '#% chance to gain {subject}',
+    'Adds # to # {subject}',
+    '+#% to {subject}',
+]
+statSubjects = [
+    'maximum Life', 'maximum Mana', 'maximum Energy Shield', 'Armour', 'Evasion Rating', 'Strength', 'Dexterity',
+    'Intelligence', 'Attack Speed', 'Cast Speed', 'Movement Speed', 'Physical Damage', 'Fire Damage', 'Cold Damage',
+    'Lightning Damage', 'Chaos Damage', 'Critical Strike Chance', 'Accuracy Rating', 'Fire Resistance',
+    'Cold Resistance', 'Lightning Resistance', 'Chaos Resistance', 'Area of Effect', 'Projectile Speed',
+    'Flask Charges gained', 'Rarity of Items found', 'Quantity of Items found', 'Stun Threshold', 'Block chance',
+    'Spell Damage', 'Minion Damage', 'Totem Life', 'Trap Damage', 'Mine Damage', 'Skill Effect Duration',
+    'Mana Regeneration Rate', 'Life Regeneration Rate', 'Damage over Time', 'Elemental Damage', 'Onslaught',
+]
+statConditions = [
+    '', '', '', '', ' while Focused', ' during Effect', ' with Bows', ' with Swords', ' while Leeching',
+    ' if you have Killed Recently', ' per Frenzy Charge', ' per Power Charge', ' while affected by Hatred',
+    ' against Ignited Enemies', ' for each Summoned Totem', ' from Shield',
+]
+wordParts = ['Ash', 'Blood', 'Bone', 'Dread', 'Ember', 'Frost', 'Gloom', 'Grave', 'Hate', 'Iron', 'Kraken', 'Loath',
+    'Mind', 'Morbid', 'Pain', 'Rage', 'Rune', 'Shadow', 'Skull', 'Soul', 'Storm', 'Thirst', 'Venom', 'Void', 'Wrath']
+wordSuffixes = ['bane', 'bite', 'brand', 'call', 'fang', 'grip', 'hold', 'horn', 'mark', 'reach', 'song', 'veil']
+itemNouns = ['Ring', 'Amulet', 'Belt', 'Sword', 'Axe', 'Mace', 'Bow', 'Wand', 'Staff', 'Shield', 'Helmet', 'Gloves',
+    'Boots', 'Body Armour', 'Quiver', 'Jewel', 'Flask', 'Map', 'Gem', 'Fragment']
+itemCategories = ['accessory.ring', 'accessory.amulet', 'accessory.belt', 'weapon.onesword', 'weapon.oneaxe',
+    'weapon.onemace', 'weapon.bow', 'weapon.wand', 'weapon.staff', 'armour.shield', 'armour.helmet', 'armour.gloves',
+    'armour.boots', 'armour.chest', 'armour.quiver', 'jewel', 'flask', 'map', 'gem.activegem', 'map.fragment']
+
+# disjoint id ranges of the original, renamed and added entries, each range is far larger than the 100x sizes
+renamedIdOffset = 1 << 30
+addedIdOffset = 1 << 31
+
+def getHashId(idx):
+    # looks like the numeric trade ids, multiplying by an odd number is a bijection mod 2^32 so ids are unique
+    return ((idx + 1) * 2654435761) & 0xFFFFFFFF
+
+def getRandom(seed, *key):
+    # entries are generated from their own seeded random, so an entry looks the same in every language
+    return random.Random(f'{seed}/{"/".join(map(str, key))}')
+
+translations = {}
+
+def translateWord(word, lang):
+    if lang == '1' or not word[:1].isalpha():
+        return word
+    translation = translations.get((word, lang))
+    if translation is None:
+        base = languageScripts.get(lang)
+        if base is None:
+            # latin script languages get a consistent respelling of each word
+            shift = int(lang)
+            translation = ''.join(chr((ord(c) - 97 + shift) % 26 + 97) if 'a' <= c <= 'z' else c for c in word)
+        else:
+            translation = ''.join(chr(base + (ord(c) * 7 + len(word)) % 80) for c in word)
+        translations[(word, lang)] = translation
+    return translation
+
+def translate(text, lang):
+    return ' '.join(translateWord(word, lang) for word in text.split(' '))
+
+def generateStat(rng, statType, reordered):
+    # a trade entry, reordered entries get at least two text entries that are reversed in the new copy
+    descs = [rng.choice(statFormats).format(subject=rng.choice(statSubjects)) + rng.choice(statConditions) for _ in range(2 if reordered or rng.random() < 0.15 else 1)]
+    suffix = validationCommon.labelSuffixes.get(statType, '')
+    stat = {'id': statType + '.stat_' + str(getHashId(rng.getrandbits(30))), 'negated': rng.random() < 0.05}
+    if rng.random() < 0.1:
+        stat['mod'] = 'local'
+    text = {}
+    for lang in languages:
+        if lang != '1' and rng.random() < 0.01:
+            continue
+        text[lang] = [{'#': validationCommon.getStatDescriptionRegex(translate(desc, lang) + suffix)} for desc in descs]
+    stat['text'] = text
+    if reordered:
+        newStat = json.loads(json.dumps(stat))
+        for lang, entries in newStat['text'].items():
+            entries.reverse()
+        return stat, newStat
+    return stat, stat
+
+def generateWord(rng):
+    return rng.choice(wordParts) + rng.choice(wordSuffixes)
+
+def generateBaseItemType(rng):
+    noun = rng.choice(itemNouns)
+    name = f'{rng.choice(wordParts)}{rng.choice(wordSuffixes)} {noun}'
+    baseItemType = {'names': {lang: translate(name, lang) for lang in languages}}
+    if rng.random() < 0.8:
+        baseItemType['image'] = f'https://web.poecdn.com/image/Art/2DItems/{noun.replace(" ", "")}/{name.replace(" ", "")}.png'
+    baseItemType['category'] = itemCategories[itemNouns.index(noun)]
+    baseItemType['width'] = rng.randint(1, 2)
+    baseItemType['height'] = rng.randint(1, 4)
+    return baseItemType
+
+class ObjectWriter:
+    # writes a json object member by member, tab indented like the exported files but with every entry on one line
+    def __init__(self, f, depth=0):
+        self.f = f
+        self.depth = depth
+        self.first = True
+
+    def writeMember(self, key, value):
+        self.f.write(('{\n' if self.first else ',\n') + '\t' * (self.depth + 1) + json.dumps(key, ensure_ascii=False) + ': ')
+        self.first = False
+        self.f.write(json.dumps(value, ensure_ascii=False))
+
+    def startObject(self, key):
+        self.f.write(('{\n' if self.first else ',\n') + '\t' * (self.depth + 1) + json.dumps(key, ensure_ascii=False) + ': ')
+        self.first = False
+        return ObjectWriter(self.f, self.depth + 1)
+
+    def end(self):
+        self.f.write(('{' if self.first else '\n' + '\t' * self.depth) + '}')
+
+class FixtureWriter:
+    # writes the original and the new copy of a file side by side
+    def __init__(self, outDir, fileName):
+        self.files = [open(os.path.join(outDir, fileName), 'w', encoding='utf-8'), open(os.path.join(outDir, 'newFiles', fileName), 'w', encoding='utf-8')]
+        self.original = ObjectWriter(self.files[0])
+        self.new = ObjectWriter(self.files[1])
+
+    def close(self):
+        self.original.end()
+        self.new.end()
+        for f in self.files:
+            f.write('\n')
+            f.close()
+
+def iterEntries(count, rates, seed, *key):
+    # yields (idx, kind) for every entry of a file, kind is None, 'missing', 'renamed', 'reordered' or 'added'.
+    # Added entries follow the entry they were generated after, so both copies are written in a single pass.
+    rng = getRandom(seed, 'entries', *key)
+    for idx in range(count):
+        roll = rng.random()
+        if roll < rates.missing:
+            yield idx, 'missing'
+        elif roll < rates.missing + rates.renamed:
+            yield idx, 'renamed'
+        elif roll < rates.missing + rates.renamed + rates.reordered:
+            yield idx, 'reordered'
+        else:
+            yield idx, None
+        if rng.random() < rates.added:
+            yield addedIdOffset + idx, 'added'
+
+def writeEntries(original, new, count, rates, seed, key, getKey, generate):
+    # generate(rng, reordered) returns the original and the new value of an entry.
+    # Reordered entries of words and base item types are moved to the end of the new copy instead.
+    movedEntries = []
+    for idx, kind in iterEntries(count, rates, seed, key):
+        originalValue, newValue = generate(getRandom(seed, key, idx), kind == 'reordered')
+        if kind != 'added':
+            original.writeMember(getKey(idx), originalValue)
+        if kind == 'renamed':
+            new.writeMember(getKey(renamedIdOffset + idx), newValue)
+        elif kind == 'reordered' and newValue is originalValue:
+            movedEntries.append((getKey(idx), newValue))
+        elif kind != 'missing':
+            new.writeMember(getKey(idx), newValue)
+    for entryKey, value in movedEntries:
+        new.writeMember(entryKey, value)
+
+def writeStats(outDir, scale, rates, seed):
+    writer = FixtureWriter(outDir, 'stats.json')
+    for statType, size in statTypeSizes.items():
+        originalType = writer.original.startObject(statType)
+        newType = writer.new.startObject(statType)
+        writeEntries(originalType, newType, size * scale, rates, seed, statType,
+            lambda idx, statType=statType: f'{statType}.stat_{getHashId(idx)}',
+            lambda rng, reordered, statType=statType: generateStat(rng, statType, reordered))
+        originalType.end()
+        newType.end()
+    writer.close()
+
+def writeWords(outDir, scale, rates, seed):
+    writer = FixtureWriter(outDir, 'words.json')
+    for lang in languages:
+        originalLang = writer.original.startObject(lang)
+        newLang = writer.new.startObject(lang)
+
+        def generate(rng, reordered):
+            word = translate(generateWord(rng), lang)
+            return word, word
+
+        writeEntries(originalLang, newLang, wordCount * scale, rates, seed, 'words', lambda idx: f'Word{idx}', generate)
+        originalLang.end()
+        newLang.end()
+    writer.close()
+
+def writeBaseItemTypesV2(outDir, scale, rates, seed):
+    writer = FixtureWriter(outDir, 'base-item-types-v2.json')
+
+    def generate(rng, reordered):
+        baseItemType = generateBaseItemType(rng)
+        return baseItemType, baseItemType
+
+    writeEntries(writer.original, writer.new, baseItemTypeCount * scale, rates, seed, 'base-item-types', lambda idx: f'Metadata/Items/Synthetic/Item{idx}', generate)
+    writer.close()
+
+generators = {
+    'stats': writeStats,
+    'words': writeWords,
+    'base-item-types-v2': writeBaseItemTypesV2,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates synthetic validation fixtures, one directory per scale (e.g. fixtures/10x/).')
+    parser.add_argument('outDir', nargs='?', default='fixtures')
+    parser.add_argument('--scales', default='1,10,100', help='comma separated multiples of the current file sizes')
+    parser.add_argument('--files', default=','.join(generators), help='comma separated files to generate')
+    parser.add_argument('--missing', type=float, default=0.01, help='rate of entries missing from the new copy')
+    parser.add_argument('--added', type=float, default=0.01, help='rate of entries added to the new copy')
+    parser.add_argument('--renamed', type=float, default=0.005, help='rate of entries with a different key in the new copy')
+    parser.add_argument('--reordered', type=float, default=0.02, help='rate of entries that moved in the new copy')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        outDir = os.path.join(args.outDir, f'{scale}x')
+        os.makedirs(os.path.join(outDir, 'newFiles'), exist_ok=True)
+        for fileName in args.files.split(','):
+            print(f'Generating {outDir}/{fileName}.json...', flush=True)
+            generators[fileName](outDir, scale, args, args.seed)
+
+if __name__ == '__main__':
+    main()
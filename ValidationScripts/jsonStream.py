@@ -0,0 +1,113 @@
+import codecs
+import json
+import re
+
+jsonDecoder = json.JSONDecoder()
+whitespaceRegex = re.compile(r'[ \t\n\r]*')
+
+class MemberScanner:
+    # Reads the members of the nested objects of a json file one at a time. Each member is decoded by the C json
+    # decoder straight from a buffer that only has to hold that member, its byte span in the file is tracked as well.
+    chunkSize = 1 << 20
+
+    def __init__(self, f):
+        self.file = f
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.bytePos = 0 # file offset of buffer[pos]
+        self.eof = False
+
+    def fill(self):
+        # reads at least as much as is still buffered, so retrying the decode of a large member stays linear
+        if self.eof:
+            return False
+        data = self.file.read(max(self.chunkSize, len(self.buffer) - self.pos))
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data, self.eof)
+        self.pos = 0
+        return not self.eof
+
+    def advance(self, end):
+        self.bytePos += len(self.buffer[self.pos:end].encode('utf-8'))
+        self.pos = end
+
+    def peek(self):
+        # the next non-whitespace character, or '' at the end of the file
+        while True:
+            end = whitespaceRegex.match(self.buffer, self.pos).end()
+            self.bytePos += end - self.pos
+            self.pos = end
+            if end < len(self.buffer):
+                return self.buffer[end]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'Expected one of {chars!r} at byte {self.bytePos} of {self.file.name}')
+        self.bytePos += 1
+        self.pos += 1
+        return char
+
+    def decode(self):
+        # decodes the value at the current position and returns (value, byteStart, byteEnd)
+        self.peek()
+        while True:
+            try:
+                value, end = jsonDecoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number ending the buffer might continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            start = self.bytePos
+            self.advance(end)
+            return value, start, self.bytePos
+
+    def iterMembers(self, depth=1, keyPath=()):
+        # yields (keyPath, value, byteStart, byteEnd) for the members of the objects at the given depth
+        # (1: the members of the object at the current position, 2: the members of those, ...)
+        self.expect('{')
+        if self.peek() == '}':
+            self.expect('}')
+            return
+        while True:
+            key = self.decode()[0]
+            self.expect(':')
+            if depth == 1:
+                value, start, end = self.decode()
+                yield (keyPath + (key,), value, start, end)
+            elif self.peek() == '{':
+                yield from self.iterMembers(depth - 1, keyPath + (key,))
+            else:
+                # values that aren't objects can't have members at the requested depth
+                self.decode()
+            if self.expect(',}') == '}':
+                return
+
+def indexMembers(path, depth=1):
+    # {keyPath: (byteStart, byteEnd)} for every member at the given depth, see MemberScanner.iterMembers
+    with open(path, 'rb') as f:
+        return {keyPath: (start, end) for keyPath, _, start, end in MemberScanner(f).iterMembers(depth)}
+
+def loadMember(f, span):
+    f.seek(span[0])
+    return json.loads(f.read(span[1] - span[0]))
+
+def iterMemberPairs(originalPath, newPath, depth=1):
+    # Yields (keyPath, originalValue, newValue) one member at a time, in the original's order followed by the added
+    # members. The value of a side that lacks the member is None. Only one pair is decoded at a time.
+    newIndex = indexMembers(newPath, depth)
+    originalKeyPaths = set()
+    with open(originalPath, 'rb') as originalFile, open(newPath, 'rb') as newFile:
+        for keyPath, originalValue, _, _ in MemberScanner(originalFile).iterMembers(depth):
+            originalKeyPaths.add(keyPath)
+            newValue = loadMember(newFile, newIndex[keyPath]) if keyPath in newIndex else None
+            yield keyPath, originalValue, newValue
+        for keyPath, span in newIndex.items():
+            if keyPath not in originalKeyPaths:
+                yield keyPath, None, loadMember(newFile, span)
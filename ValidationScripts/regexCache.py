@@ -0,0 +1,82 @@
+import collections
+import json
+import re
+
+# A process-wide cache of compiled regexes, for the tools that work on the stats.json text regexes. re only keeps a
+# few hundred compiled patterns, there are tens of thousands of text regexes across the languages.
+# The cache is bounded and evicts the least recently used pattern, and counts its hits and misses. The patterns used
+# most can be saved and compiled up front by the next run with load(), see the --regex-cache option of the tools.
+# The stat validators run by validateAll share a worker process and so the cache.
+
+defaultMaxSize = 65536
+
+# marks a pattern that isn't in the cache, None is cached for patterns that don't compile
+missing = object()
+
+class RegexCache:
+    def __init__(self, maxSize=defaultMaxSize):
+        self.maxSize = maxSize
+        # {pattern: compiled pattern or None}, least recently used first
+        self.patterns = collections.OrderedDict()
+        self.uses = collections.Counter()
+        # the patterns load() read, in their saved order
+        self.loaded = []
+        self.hits = 0
+        self.misses = 0
+        self.preloaded = 0
+
+    def add(self, pattern):
+        try:
+            compiled = re.compile(pattern)
+        except re.error:
+            compiled = None
+        self.patterns[pattern] = compiled
+        if len(self.patterns) > self.maxSize:
+            evicted, _ = self.patterns.popitem(last=False)
+            del self.uses[evicted]
+        return compiled
+
+    def compile(self, pattern):
+        # the compiled pattern, None if it isn't a valid regex
+        compiled = self.patterns.get(pattern, missing)
+        if compiled is missing:
+            self.misses += 1
+            compiled = self.add(pattern)
+        else:
+            self.hits += 1
+            self.patterns.move_to_end(pattern)
+        self.uses[pattern] += 1
+        return compiled
+
+    def load(self, path):
+        # compiles the patterns saved by an earlier run, a missing or broken file is ignored
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                patterns = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.loaded = [pattern for pattern in patterns[:self.maxSize] if isinstance(pattern, str)]
+        for pattern in self.loaded:
+            if pattern not in self.patterns:
+                self.add(pattern)
+                self.preloaded += 1
+
+    def save(self, path, count=None):
+        # saves the patterns used by this run, most used first, followed by the loaded ones it didn't use. At most
+        # count (maxSize by default) are kept, so the loaded patterns nothing uses anymore are dropped eventually.
+        if count is None:
+            count = self.maxSize
+        patterns = [pattern for pattern, _ in self.uses.most_common(count)]
+        patterns += [pattern for pattern in self.loaded if pattern not in self.uses][:count - len(patterns)]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(patterns, f)
+
+    def getSummary(self):
+        lookups = self.hits + self.misses
+        hitRate = f'{self.hits / lookups:.1%}' if lookups else '-'
+        return f'regex cache: {len(self.patterns)} patterns ({self.preloaded} preloaded), {self.hits} hits, {self.misses} misses, hit rate {hitRate}'
+
+defaultCache = RegexCache()
+
+def compile(pattern):
+    return defaultCache.compile(pattern)
@@ -0,0 +1,101 @@
+import io
+import json
+import queue
+import threading
+import time
+
+import findingsFormat
+
+class ReportWriter:
+    # Collects the log lines of a validator in memory and writes them to the log file in large chunks from a
+    # background thread. The console only gets a rate-limited progress line and a summary, nothing when quiet.
+    # Findings passed along with their log line are also written as records (see findingsFormat) to findingsPath
+    # as JSON Lines and to binaryPath in the compact binary format, source is the validated file.
+    def __init__(self, path, quiet=False, findingsPath=None, binaryPath=None, source=None, chunkSize=8192, progressInterval=1.0):
+        self.path = path
+        self.quiet = quiet
+        self.source = source
+        self.chunkSize = chunkSize
+        self.progressInterval = progressInterval
+        self.lines = []
+        self.records = []
+        self.count = 0
+        self.lastProgress = time.monotonic()
+        # the first exception of the writer thread, raised again by flush and close
+        self.error = None
+        # bounded, so a slow disk throttles the validator instead of buffering the whole log
+        self.chunks = queue.Queue(16)
+        self.file = io.open(path, 'w', encoding='utf-8')
+        self.findingsFile = io.open(findingsPath, 'w', encoding='utf-8') if findingsPath is not None else None
+        self.binaryWriter = findingsFormat.FindingsWriter(binaryPath, source) if binaryPath is not None else None
+        self.thread = threading.Thread(target=self.writeChunks, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def writeLog(self, log, record=None):
+        # record: the finding (a diffEngine.DiffRecord) the log line reports, if any
+        self.lines.append(log)
+        if record is not None:
+            self.records.append(record)
+        self.count += 1
+        if not self.quiet and time.monotonic() - self.lastProgress >= self.progressInterval:
+            self.lastProgress = time.monotonic()
+            print(f'{self.path}: {self.count} lines...', flush=True)
+        if len(self.lines) >= self.chunkSize:
+            self.flush()
+
+    def raiseError(self):
+        if self.error is not None:
+            raise self.error
+
+    def flush(self):
+        self.raiseError()
+        if self.lines:
+            self.chunks.put((self.lines, self.records))
+            self.lines = []
+            self.records = []
+
+    def writeChunks(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                break
+            # after an error the queue is still drained, so the validator never blocks on a full queue
+            if self.error is not None:
+                continue
+            lines, records = chunk
+            try:
+                self.file.write('\n'.join(lines) + '\n')
+                if records and self.findingsFile is not None:
+                    self.findingsFile.write(''.join(json.dumps(findingsFormat.toFinding(record.kind, self.source, list(record.path), record.old, record.new, record.aspect, record.value), ensure_ascii=False) + '\n' for record in records))
+                if records and self.binaryWriter is not None:
+                    self.binaryWriter.writeRecords(records)
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.lines:
+            self.chunks.put((self.lines, self.records))
+            self.lines = []
+            self.records = []
+        self.chunks.put(None)
+        self.thread.join()
+        try:
+            self.file.close()
+            if self.findingsFile is not None:
+                self.findingsFile.close()
+            if self.binaryWriter is not None:
+                self.binaryWriter.close()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+        self.raiseError()
+        if not self.quiet:
+            print(f'{self.path}: {self.count} lines written', flush=True)
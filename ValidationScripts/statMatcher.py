@@ -0,0 +1,227 @@
+import argparse
+import random
+import re
+import time
+from collections import namedtuple
+
+import regexCache
+import validationCommon
+
+# Matches item text lines against the text regexes of stats.json without trying every regex on every line.
+# Each regex is indexed by its literal prefix or suffix (whichever is longer) in a character trie, a line then only
+# walks the tries to find the few regexes whose literal parts it starts and ends with, and only those are run.
+# Usage: python statMatcher.py [stats.json] [--lines 1000] [--languages 1,2] [--regex-cache regexes.json], benchmarks the matcher per language
+# block against trying every regex
+
+# statType/statId: where the text is in stats.json, predicate: the key of the text entry, values: the placeholders
+StatMatch = namedtuple('StatMatch', ['statType', 'statId', 'predicate', 'values'])
+
+# characters that end a literal, after a backslash they're literals themselves
+regexSpecials = set('.^$*+?{}[]|()\\')
+quantifiers = set('*+?{')
+
+def getLiteralTokens(regex):
+    # the regex as a list of literal characters, with None for everything that can match something else.
+    # None if the regex has an alternation at the top level, it then has no literal prefix or suffix.
+    body = regex[1:] if regex.startswith('^') else regex
+    if body.endswith('$') and not body.endswith('\\$'):
+        body = body[:-1]
+    tokens = []
+    pos = 0
+    while pos < len(body):
+        c = body[pos]
+        if c == '\\' and pos + 1 < len(body):
+            escaped = body[pos + 1]
+            tokens.append(None if escaped.isalnum() else escaped)
+            pos += 2
+        elif c == '(' or c == '[':
+            # a group or a class, skipped up to its (nested) end
+            depth = 0
+            while pos < len(body):
+                if body[pos] == '\\':
+                    pos += 1
+                elif body[pos] in '([':
+                    depth += 1
+                elif body[pos] in ')]':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                pos += 1
+            tokens.append(None)
+            pos += 1
+        elif c == '|':
+            return None
+        elif c in quantifiers:
+            # the previous token is optional or repeated
+            if tokens:
+                tokens[-1] = None
+            tokens.append(None)
+            pos += 1
+        else:
+            tokens.append(None if c in regexSpecials else c)
+            pos += 1
+    return tokens
+
+def getLiterals(regex):
+    # (prefix, suffix): what every line the regex matches starts and ends with
+    tokens = getLiteralTokens(regex)
+    if tokens is None or not regex.startswith('^'):
+        return '', ''
+    prefix = []
+    for token in tokens:
+        if token is None:
+            break
+        prefix.append(token)
+    if len(prefix) == len(tokens):
+        # nothing but literals, so the prefix is the whole line
+        return ''.join(prefix), ''
+    suffix = []
+    if regex.endswith('$') and not regex.endswith('\\$'):
+        for token in reversed(tokens):
+            if token is None:
+                break
+            suffix.append(token)
+    return ''.join(prefix), ''.join(reversed(suffix))
+
+def iterTexts(stats, language):
+    # (statType, statId, predicate, regex) of every text of the language block
+    for statType, typeStats in stats.items():
+        for statId, stat in typeStats.items():
+            if 'text' not in stat or language not in stat['text']:
+                continue
+            descs = stat['text'][language]
+            descObjs = [descs] if isinstance(descs, dict) else descs
+            for descObj in descObjs:
+                for predicate, regex in descObj.items():
+                    yield statType, statId, predicate, regex
+
+def compileRegex(regex):
+    # None for regexes Python can't compile, they never match
+    return regexCache.compile(regex)
+
+class StatMatcher:
+    def __init__(self, texts):
+        # texts: [(statType, statId, predicate, regex)], see iterTexts
+        self.texts = list(texts)
+        self.literals = []
+        self.regexes = [None] * len(self.texts)
+        # a trie node is {character: node}, the None key holds the indexes of the texts whose literal ends there
+        self.prefixTrie = {}
+        self.suffixTrie = {}
+        for textIdx, (_, _, _, regex) in enumerate(self.texts):
+            prefix, suffix = getLiterals(regex)
+            self.literals.append((prefix, suffix))
+            if len(prefix) >= len(suffix):
+                node = self.prefixTrie
+                for c in prefix:
+                    node = node.setdefault(c, {})
+            else:
+                node = self.suffixTrie
+                for c in reversed(suffix):
+                    node = node.setdefault(c, {})
+            node.setdefault(None, []).append(textIdx)
+
+    def getCandidates(self, line):
+        # indexes of the texts whose prefix and suffix the line has, in stats.json order
+        candidates = []
+        for trie, chars in ((self.prefixTrie, line), (self.suffixTrie, reversed(line))):
+            node = trie
+            candidates += node.get(None, ())
+            for c in chars:
+                node = node.get(c)
+                if node is None:
+                    break
+                candidates += node.get(None, ())
+        candidates.sort()
+        literals = self.literals
+        return [textIdx for textIdx in candidates if line.startswith(literals[textIdx][0]) and line.endswith(literals[textIdx][1]) and len(line) >= len(literals[textIdx][0]) + len(literals[textIdx][1])]
+
+    def match(self, line):
+        # [StatMatch] of every text matching the line
+        matches = []
+        for textIdx in self.getCandidates(line):
+            regex = self.regexes[textIdx]
+            if regex is None:
+                regex = self.regexes[textIdx] = compileRegex(self.texts[textIdx][3]) or False
+            if regex is False:
+                continue
+            result = regex.match(line)
+            if result is not None:
+                statType, statId, predicate, _ = self.texts[textIdx]
+                matches.append(StatMatch(statType, statId, predicate, result.groups()))
+        return matches
+
+def getLanguages(stats):
+    # the language blocks of stats.json, in the order they first appear
+    languages = {}
+    for typeStats in stats.values():
+        for stat in typeStats.values():
+            languages.update(dict.fromkeys(stat.get('text', ())))
+    return list(languages)
+
+def loadMatchers(stats):
+    # {language: StatMatcher} for every language block of stats.json
+    return {language: StatMatcher(iterTexts(stats, language)) for language in getLanguages(stats)}
+
+def matchNaive(compiledTexts, line):
+    # tries every regex, what a consumer without the matcher does
+    matches = []
+    for statType, statId, predicate, regex in compiledTexts:
+        if regex is None:
+            continue
+        result = regex.match(line)
+        if result is not None:
+            matches.append(StatMatch(statType, statId, predicate, result.groups()))
+    return matches
+
+def buildLines(texts, count, rng):
+    # item text lines: texts with numbers filled in, and a few lines that don't match anything
+    lines = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            lines.append(f'Item Level: {rng.randint(1, 86)}')
+            continue
+        line = validationCommon.getStatDescription(rng.choice(texts)[3])
+        lines.append(re.sub('#', lambda _: str(rng.randint(1, 200)), line))
+    return lines
+
+def benchmark(stats, language, lineCount, seed=0):
+    start = time.perf_counter()
+    matcher = StatMatcher(iterTexts(stats, language))
+    buildSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    compiledTexts = [(statType, statId, predicate, compileRegex(regex)) for statType, statId, predicate, regex in matcher.texts]
+    compileSeconds = time.perf_counter() - start
+    lines = buildLines(matcher.texts, lineCount, random.Random(seed))
+
+    start = time.perf_counter()
+    naiveMatches = [matchNaive(compiledTexts, line) for line in lines]
+    naiveSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = [matcher.match(line) for line in lines]
+    matcherSeconds = time.perf_counter() - start
+    if matches != naiveMatches:
+        raise AssertionError(f'The matcher and trying every regex disagree on language {language}')
+    print(f'{language:>3}: {len(matcher.texts):6} texts, {len(lines)} lines | every regex: {len(lines) / naiveSeconds:10.0f} lines/s (compiling {compileSeconds:.2f}s)'
+        + f' | matcher: {len(lines) / matcherSeconds:10.0f} lines/s (building {buildSeconds:.2f}s) | {naiveSeconds / matcherSeconds:.0f}x')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the stat line matcher against trying every regex.')
+    parser.add_argument('path', nargs='?', default='stats.json')
+    parser.add_argument('--lines', type=int, default=1000, help='number of item text lines per language')
+    parser.add_argument('--languages', help='comma separated language blocks, defaults to all')
+    parser.add_argument('--regex-cache', help='compile the regexes listed in this file up front, and save the most used ones to it')
+    args = parser.parse_args()
+
+    if args.regex_cache:
+        regexCache.defaultCache.load(args.regex_cache)
+    stats = validationCommon.loadJson(args.path)
+    languages = args.languages.split(',') if args.languages else getLanguages(stats)
+    for language in languages:
+        benchmark(stats, language, args.lines)
+    print(regexCache.defaultCache.getSummary())
+    if args.regex_cache:
+        regexCache.defaultCache.save(args.regex_cache)
+
+if __name__ == '__main__':
+    main()
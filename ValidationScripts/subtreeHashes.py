@@ -0,0 +1,72 @@
+import hashlib
+import marshal
+import os
+
+hashVersion = 1
+digestSize = 16
+
+def hashValue(value):
+    # repr is stable for decoded json values (str, int, float, bool, None, list, dict) and a lot cheaper than json.dumps
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=digestSize).digest()
+
+def hashTree(tree, maxDepth):
+    # Merkle hashes of a decoded json tree: {path: digest} for every dict above maxDepth and every node at maxDepth.
+    # A dict's digest covers its keys and the digests of its children, so equal digests mean equal subtrees.
+    hashes = {}
+
+    def hashNode(value, path):
+        if len(path) == maxDepth or type(value) is not dict:
+            digest = hashValue(value)
+            if len(path) == maxDepth:
+                hashes[path] = digest
+            return digest
+        nodeHash = hashlib.blake2b(digest_size=digestSize)
+        for key, child in value.items():
+            nodeHash.update(key.encode('utf-8'))
+            nodeHash.update(b'\0')
+            nodeHash.update(hashNode(child, path + (key,)))
+        digest = nodeHash.digest()
+        hashes[path] = digest
+        return digest
+
+    hashNode(tree, ())
+    return hashes
+
+def getFingerprint(jsonPath):
+    stat = os.stat(jsonPath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def getHashesPath(jsonPath):
+    return os.path.splitext(jsonPath)[0] + '.hashes'
+
+def loadHashes(jsonPath, maxDepth):
+    # returns the persisted hashes of jsonPath, or None when they are missing or outdated
+    hashesPath = getHashesPath(jsonPath)
+    if not os.path.exists(hashesPath):
+        return None
+    try:
+        with open(hashesPath, 'rb') as f:
+            persisted = marshal.loads(f.read())
+    except (EOFError, ValueError, TypeError):
+        return None
+    if type(persisted) is not dict or persisted.get('version') != hashVersion or persisted.get('maxDepth') != maxDepth or persisted.get('fingerprint') != getFingerprint(jsonPath):
+        return None
+    return persisted['hashes']
+
+def saveHashes(jsonPath, maxDepth, hashes):
+    persisted = {
+        'version': hashVersion,
+        'maxDepth': maxDepth,
+        'fingerprint': getFingerprint(jsonPath),
+        'hashes': hashes,
+    }
+    with open(getHashesPath(jsonPath), 'wb') as f:
+        f.write(marshal.dumps(persisted))
+
+def getHashes(jsonPath, tree, maxDepth):
+    # reuses the hashes persisted next to jsonPath while the file is unchanged, otherwise hashes the tree and persists it
+    hashes = loadHashes(jsonPath, maxDepth)
+    if hashes is None:
+        hashes = hashTree(tree, maxDepth)
+        saveHashes(jsonPath, maxDepth, hashes)
+    return hashes
@@ -0,0 +1,88 @@
+import concurrent.futures
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+
+import validationCommon
+
+# Runs every validator whose files exist. Each file is parsed once by a worker of its own, which then forks a worker
+# per validator of the file (up to --jobs), so the validators of a file run at the same time on a single parse. Where
+# processes can't be forked (Windows) the validators of a file run one after the other in its worker.
+# With --stream, the validators that need the whole file are skipped for the files that are validated streamed.
+
+# validator module name, whether it compares the file to its newFiles/ copy and whether it supports --stream
+validators = [
+    ('validateStats', True, True),
+    ('validateRenamedStats', True, False),
+    ('validateIdenticalStats', False, False),
+    ('validateAmbiguousStats', False, False),
+    ('validateStatsIndistinguishable', True, True),
+    ('validateWords', True, False),
+    ('validateClientStrings', True, False),
+    ('validateBaseItemTypes', True, False),
+    ('validateBaseItemTypesV2', True, False),
+    ('validateBaseItemCategories', True, False),
+]
+
+# the parsed files of a group, inherited by the forked validator workers
+sharedCache = None
+
+def findApplicableValidators(stream=False):
+    # {fileName: [validator module names]} for the files that exist in the current directory (and newFiles/)
+    # stream: leave out the validators that don't stream of the files that have one that does
+    groups = {}
+    streamedFiles = set()
+    for moduleName, compares, streams in validators:
+        fileName = importlib.import_module(moduleName).fileName
+        originalPath, newPath = validationCommon.getPaths(fileName)
+        if os.path.exists(originalPath) and (not compares or os.path.exists(newPath)):
+            groups.setdefault(fileName, []).append((moduleName, streams))
+            if streams:
+                streamedFiles.add(fileName)
+    return {fileName: [moduleName for moduleName, streams in moduleNames if not stream or streams or fileName not in streamedFiles] for fileName, moduleNames in groups.items()}
+
+def runValidator(moduleName):
+    start = time.perf_counter()
+    importlib.import_module(moduleName).main(sharedCache)
+    return moduleName, time.perf_counter() - start
+
+def runGroup(fileName, moduleNames):
+    # parses the file once and runs its validators on it, in forked workers when possible
+    global sharedCache
+    sharedCache = {}
+    timings = []
+    if '--stream' not in sys.argv[1:]:
+        start = time.perf_counter()
+        for path in validationCommon.getPaths(fileName):
+            if os.path.exists(path):
+                validationCommon.loadJson(path, sharedCache)
+        timings.append((f'load {fileName}.json', time.perf_counter() - start))
+    jobs = min(validationCommon.getJobs(), len(moduleNames))
+    if jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+            timings += executor.map(runValidator, moduleNames)
+    else:
+        timings += map(runValidator, moduleNames)
+    return timings
+
+def main():
+    groups = findApplicableValidators('--stream' in sys.argv[1:])
+    if not groups:
+        print('No files to validate found.')
+        return
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(min(validationCommon.getJobs(), len(groups))) as executor:
+        futures = [executor.submit(runGroup, fileName, moduleNames) for fileName, moduleNames in groups.items()]
+        timings = [timing for future in futures for timing in future.result()]
+    total = time.perf_counter() - start
+
+    print('')
+    print('Timings:')
+    for name, seconds in timings:
+        print(f'{name:<45} {seconds:8.2f}s')
+    print(f'{"total (wall clock)":<45} {total:8.2f}s')
+
+if __name__ == '__main__':
+    main()
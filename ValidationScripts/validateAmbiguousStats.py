@@ -0,0 +1,257 @@
+import re
+import sys
+
+import diffEngine
+import regexCache
+import validationCommon
+from validateIdenticalStats import getDescriptions
+
+fileName = 'stats'
+
+AMBIGUOUS = 'Ambiguous'
+
+# elements of a token besides literal characters: any non-whitespace character, and zero or more of them.
+# (\S+) is ANY followed by STAR.
+ANY = 1
+STAR = 2
+
+placeholder = '(\\S+)'
+
+# regex characters that can match whitespace or change what the rest of the regex matches, a regex with one of these
+# (or an escape like \s) isn't only compared within its whitespace bucket but with every other regex
+crossCheckChars = set('.[|*?{')
+
+# descriptions that are (True) or aren't (False) ambiguous, checked with --edge-cases
+edgeCases = [
+    (['#% of Damage.Taken', '#% of Damage Taken'], True),
+    (['#% of Damage.Taken', '#% of Damage Dealt'], False),
+    (['Foo|Bar baz', 'Foo'], True),
+    (['# to [Fire] Resistance', '# to F Resistance'], True),
+    (['Fire\\sDamage', 'Fire Damage'], True),
+    (['#% increased Lifes? Regeneration', '#% increased Life Regeneration'], True),
+    (['#% increased Damage', '1#% increased Damage'], True),
+    (['#% increased Damage', '#% increased # Damage'], False),
+]
+
+def parseToken(token):
+    # the elements of a whitespace-free part of a text regex, None if it uses more than placeholders, escapes and .
+    elements = []
+    pos = 0
+    while pos < len(token):
+        if token.startswith(placeholder, pos):
+            elements += (ANY, STAR)
+            pos += len(placeholder)
+        elif token[pos] == '\\' and pos + 1 < len(token) and not token[pos + 1].isalnum():
+            elements.append(token[pos + 1])
+            pos += 2
+        elif token[pos] == '.':
+            elements.append(ANY)
+            pos += 1
+        elif token[pos] in '\\()[]{}|*+?^$':
+            return None
+        else:
+            elements.append(token[pos])
+            pos += 1
+    return tuple(elements)
+
+def parsePattern(regex):
+    # (separators, tokens) of a ^...$ text regex: (\S+) never matches whitespace, so a line it matches has exactly the
+    # whitespace of the regex, and the parts in between can be compared one by one. None if it can't be compared.
+    if not regex.startswith('^') or not regex.endswith('$'):
+        return None
+    parts = re.split(r'(\s+)', regex[1:-1])
+    tokens = tuple(parseToken(part) for part in parts[::2])
+    if None in tokens:
+        return None
+    return tuple(parts[1::2]), tokens
+
+def intersectTokens(x, y):
+    # a string matched by both tokens, or None: a breadth-first search over pairs of positions in the two tokens
+    parents = {(0, 0): None}
+    pending = [(0, 0)]
+    while pending:
+        nextPending = []
+        for state in pending:
+            i, j = state
+            if i == len(x) and j == len(y):
+                example = []
+                while parents[state] is not None:
+                    state, c = parents[state]
+                    example.append(c)
+                return ''.join(reversed(example))
+            elementX = x[i] if i < len(x) else None
+            elementY = y[j] if j < len(y) else None
+            moves = []
+            # a STAR can match nothing
+            if elementX == STAR:
+                moves.append(((i + 1, j), ''))
+            if elementY == STAR:
+                moves.append(((i, j + 1), ''))
+            # or both consume the same character, a STAR stays where it is
+            if elementX is not None and elementY is not None and not (elementX == STAR and elementY == STAR):
+                if isinstance(elementX, str) and isinstance(elementY, str):
+                    c = elementX if elementX == elementY else None
+                else:
+                    c = elementX if isinstance(elementX, str) else elementY if isinstance(elementY, str) else '1'
+                if c is not None:
+                    moves.append(((i + (elementX != STAR), j + (elementY != STAR)), c))
+            for nextState, c in moves:
+                if nextState not in parents:
+                    parents[nextState] = (state, c)
+                    nextPending.append(nextState)
+        pending = nextPending
+    return None
+
+def findAmbiguities(patterns):
+    # [(x, y, example line)] of the pattern indexes that match a common line. patterns: [(statId, regex, separators,
+    # tokens)]. They're bucketed by their whitespace, and inside a bucket indexed by the literal tokens at each
+    # position, so only patterns that agree on at least their most selective literal token are compared.
+    buckets = {}
+    for patternIdx, (_, _, separators, _) in enumerate(patterns):
+        buckets.setdefault(separators, []).append(patternIdx)
+    tokenExamples = {}
+    ambiguities = []
+    for bucket in buckets.values():
+        tokenCount = len(patterns[bucket[0]][3])
+        literals = [{} for _ in range(tokenCount)]
+        wildcards = [[] for _ in range(tokenCount)]
+        for patternIdx in bucket:
+            for position, token in enumerate(patterns[patternIdx][3]):
+                if ANY in token:
+                    wildcards[position].append(patternIdx)
+                else:
+                    literals[position].setdefault(token, []).append(patternIdx)
+        for patternIdx in bucket:
+            statId, regex, _, tokens = patterns[patternIdx]
+            candidates = bucket
+            for position, token in enumerate(tokens):
+                if ANY not in token and len(literals[position][token]) + len(wildcards[position]) < len(candidates):
+                    candidates = literals[position][token] + wildcards[position]
+            for otherIdx in candidates:
+                otherStatId, otherRegex, separators, otherTokens = patterns[otherIdx]
+                # each pair once, identical descriptions are reported by validateIdenticalStats
+                if otherIdx <= patternIdx or otherStatId == statId or otherRegex == regex:
+                    continue
+                example = []
+                for token, otherToken in zip(tokens, otherTokens):
+                    if token == otherToken and ANY not in token:
+                        example.append(''.join(token))
+                        continue
+                    key = (token, otherToken)
+                    if key not in tokenExamples:
+                        tokenExamples[key] = intersectTokens(token, otherToken)
+                    if tokenExamples[key] is None:
+                        break
+                    example.append(tokenExamples[key])
+                else:
+                    line = example[0] + ''.join(separator + part for separator, part in zip(separators, example[1:]))
+                    ambiguities.append((patternIdx, otherIdx, line))
+    ambiguities.sort()
+    return ambiguities
+
+def needsCrossCheck(regex):
+    # whether a line the regex matches can have other whitespace than the regex, see crossCheckChars
+    body = regex.replace(placeholder, '')
+    pos = 0
+    while pos < len(body):
+        if body[pos] == '\\':
+            if pos + 1 < len(body) and body[pos + 1].isalnum():
+                return True
+            pos += 2
+        elif body[pos] in crossCheckChars:
+            return True
+        else:
+            pos += 1
+    return False
+
+def getLine(regex):
+    # a line the regex of a description matches, with a number for every placeholder
+    return validationCommon.getStatDescription(regex).replace('#', '1')
+
+def matchesBoth(regex, otherRegex, line):
+    # the lines are checked with the regexes themselves, compiled through the cache the stat tools share
+    return all(compiled is not None and compiled.match(line) for compiled in map(regexCache.compile, (regex, otherRegex)))
+
+def findCrossAmbiguities(descs, crossIdxs):
+    # [(x, y, example line)] of the descs indexes of the regexes that need a cross check (see needsCrossCheck) and
+    # any other regex that match a common line. descs: [(statId, regex)]. A regex is only tried on the example line of
+    # the other one and the other way around, which finds the lines where . or \s match a space.
+    if not crossIdxs:
+        return []
+    lines = [getLine(regex) for _, regex in descs]
+    compiled = [regexCache.compile(regex) for _, regex in descs]
+    ambiguities = []
+    for crossIdx in crossIdxs:
+        statId, regex = descs[crossIdx]
+        crossCompiled = compiled[crossIdx]
+        if crossCompiled is None:
+            continue
+        for otherIdx, (otherStatId, otherRegex) in enumerate(descs):
+            otherCompiled = compiled[otherIdx]
+            if otherCompiled is None or otherStatId == statId or otherRegex == regex:
+                continue
+            for line in (lines[otherIdx], lines[crossIdx]):
+                if crossCompiled.match(line) and otherCompiled.match(line):
+                    ambiguities.append((min(crossIdx, otherIdx), max(crossIdx, otherIdx), line))
+                    break
+    return ambiguities
+
+def findAllAmbiguities(descs):
+    # [(x, y, example line)] of the descs indexes of all ambiguous regexes, each pair once and in index order
+    patterns = []
+    patternDescs = []
+    crossIdxs = []
+    for descIdx, (statId, regex) in enumerate(descs):
+        parsed = parsePattern(regex)
+        if parsed is not None:
+            patterns.append((statId, regex) + parsed)
+            patternDescs.append(descIdx)
+        if parsed is None or needsCrossCheck(regex):
+            crossIdxs.append(descIdx)
+    ambiguities = {}
+    for x, y, line in findAmbiguities(patterns):
+        ambiguities[(patternDescs[x], patternDescs[y])] = line
+    for x, y, line in findCrossAmbiguities(descs, crossIdxs):
+        ambiguities.setdefault((x, y), line)
+    return [(x, y, line) for (x, y), line in sorted(ambiguities.items())]
+
+def checkEdgeCases():
+    # the edgeCases that aren't reported as they should be
+    failed = []
+    for descs, ambiguous in edgeCases:
+        regexes = [(str(descIdx), validationCommon.getStatDescriptionRegex(desc)) for descIdx, desc in enumerate(descs)]
+        if bool(findAllAmbiguities(regexes)) != ambiguous:
+            failed.append(descs)
+    return failed
+
+def validate(stats, writeLog):
+    for statType in stats:
+        writeLog('Checking stat type: ' + statType)
+        stat_type_x = stats[statType]
+        descs = []
+        for stat_x in stat_type_x:
+            if 'id' in stat_type_x[stat_x] and 'text' in stat_type_x[stat_x] and '1' in stat_type_x[stat_x]['text']:
+                for descContent in dict.fromkeys(getDescriptions(stat_type_x[stat_x]['text']['1'])):
+                    descs.append((stat_x, descContent))
+        for x, y, line in findAllAmbiguities(descs):
+            stat_x, descContent = descs[x]
+            stat_y, otherDescContent = descs[y]
+            if not matchesBoth(descContent, otherDescContent, line):
+                continue
+            # path ends in both stats, old/new hold their descriptions and value a line both match
+            record = diffEngine.DiffRecord(AMBIGUOUS, (statType, stat_x, stat_y), descContent, otherDescContent, None, line)
+            writeLog('Ambiguous Stat: ' + stat_x + ' and ' + stat_y + ' | Desc: \'' + descContent + '\' | OtherDesc: \'' + otherDescContent + '\' | Both match: \'' + line + '\'', record)
+        writeLog('---')
+        writeLog('')
+
+def main(cache=None):
+    if '--edge-cases' in sys.argv[1:]:
+        failed = checkEdgeCases()
+        print(f'edge cases: {len(edgeCases) - len(failed)}/{len(edgeCases)} reported as expected')
+        for descs in failed:
+            print(f'  wrong: {descs}')
+        return
+    validationCommon.runSingle(fileName, validate, 'validate-ambiguous-' + fileName + '.log', cache)
+
+if __name__ == '__main__':
+    main()
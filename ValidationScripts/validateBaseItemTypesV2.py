@@ -1,53 +1,34 @@
-import json
-import io
+import diffEngine
+import validationCommon
 
 fileName = 'base-item-types-v2'
 
-def writeLog(logFile, log):
-    print(log.encode("utf-8"))
-    logFile.write(log + "\n")
+# id and its keys (names block)
+hashDepth = 2
 
-#open stats files
-with open(fileName + '.json', 'r', encoding='utf-8') as f:
-    originalBITs = json.load(f)
-with open('newFiles/' + fileName + '.json', 'r', encoding='utf-8') as f:
-    newBITs = json.load(f)
+def descend(path):
+    # walk the ids and their names, all other keys are compared by value
+    return len(path) < 2 or (len(path) == 2 and path[1] == 'names')
 
-with io.open('validate-' + fileName + '.log', 'w', encoding='utf-8') as f:
-    # check which data got removed or changed
-    for originalId in originalBITs:
-        #writeLog(f, f'Checking {originalId}')
-        # check if original exists in new
-        if originalId not in newBITs:
-            writeLog(f, f'Missing {originalId}')
-        else: 
-            # check all keys
-            for originalKey in originalBITs[originalId]:
-                if originalKey not in newBITs[originalId]:
-                    writeLog(f, f'Missing {originalId}.{originalKey}')
-                else:
-                    if originalKey == 'names':
-                        for originalName in originalBITs[originalId][originalKey]:
-                            if originalName not in newBITs[originalId][originalKey]:
-                                writeLog(f, f'Missing {originalId}.{originalName}')
-                            else:
-                                originalNameValue = originalBITs[originalId][originalKey][originalName]
-                                newNameValue = newBITs[originalId][originalKey][originalName]
-                                if originalNameValue != newNameValue:
-                                    writeLog(f, f'Changed {originalId}.{originalKey}.{originalName} (Original: {originalNameValue} | New {newNameValue})')
-                    else:
-                        originalValue = str(originalBITs[originalId][originalKey])
-                        newValue = str(newBITs[originalId][originalKey])
-                        if originalValue != newValue:
-                            writeLog(f, f'Changed {originalId}.{originalKey} (Original: {originalValue} | New: {newValue})')
-        #writeLog(f, '---')
-        #writeLog(f, '')
+def validate(originalBITs, newBITs, writeLog, originalHashes=None, newHashes=None):
+    records = diffEngine.diffTrees(originalBITs, newBITs, descend=descend, originalHashes=originalHashes, newHashes=newHashes)
+    for record in diffEngine.orderRecords(records):
+        path = record.path
+        if record.kind == diffEngine.MISSING:
+            if len(path) == 3:
+                writeLog(f'Missing {path[0]}.{path[2]}', record)
+            else:
+                writeLog(f'Missing {diffEngine.formatPath(path)}', record)
+        elif record.kind == diffEngine.CHANGED:
+            if len(path) == 3:
+                writeLog(f'Changed {diffEngine.formatPath(path)} (Original: {record.old} | New {record.new})', record)
+            else:
+                writeLog(f'Changed {diffEngine.formatPath(path)} (Original: {record.old} | New: {record.new})', record)
+        elif len(path) < 3:
+            writeLog(f'Added {diffEngine.formatPath(path)}', record)
 
-    # check if which new data got added
-    for newId in newBITs:
-        if newId not in originalBITs:
-           writeLog(f, f'Added {newId}')
-        else:
-           for newKey in newBITs[newId]:
-               if newKey not in originalBITs[newId]:
-                   writeLog(f, f'Added {newId}.{newKey}')
+def main(cache=None):
+    validationCommon.run(fileName, validate, hashDepth, cache=cache)
+
+if __name__ == '__main__':
+    main()
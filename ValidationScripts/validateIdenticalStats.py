@@ -1,42 +1,48 @@
-import json
-import io
+import diffEngine
+import validationCommon
 
 fileName = 'stats'
 
-def writeLog(logFile, log):
-    print(log)
-    logFile.write(log + "\n")
+IDENTICAL = 'Identical'
 
-#open stats files
-with open(fileName + '.json', 'r', encoding='utf-8') as f:
-    stats = json.load(f)
+def getDescriptions(descs):
+    # text blocks are lists of {predicate: regex} objects, older files used a single {predicate: regex} object
+    if isinstance(descs, dict):
+        return descs.values()
+    return [descContent for descObj in descs for descContent in descObj.values()]
 
-with io.open('validate-identical-' + fileName + '.log', 'w', encoding='utf-8') as f:
+def validate(stats, writeLog):
     for statType in stats:
-        writeLog(f, 'Checking stat type: ' + statType)
+        writeLog('Checking stat type: ' + statType)
         stat_type_x = stats[statType]
+        # index each english description to the stats (and their mod) using it, so only actual collisions are compared
+        descIndex = {}
         for stat_x in stat_type_x:
             if 'id' in stat_type_x[stat_x] and 'text' in stat_type_x[stat_x] and '1' in stat_type_x[stat_x]['text']:
-                descs = stat_type_x[stat_x]['text']['1']
                 mod = ''
                 if 'mod' in stat_type_x[stat_x]:
                     mod = stat_type_x[stat_x]['mod']
-                for desc in descs:
-                    descContent = descs[desc]
-                    for stat_y in stat_type_x:
-                        if stat_x != stat_y and 'id' in stat_type_x[stat_y] and 'text' in stat_type_x[stat_y] and '1' in stat_type_x[stat_y]['text']:
-                            otherDescs = stat_type_x[stat_y]['text']['1']
-                            otherMod = ''
-                            if 'mod' in stat_type_x[stat_y]:
-                                otherMod = stat_type_x[stat_y]['mod']
-                            for otherDesc in otherDescs:
-                                otherDescContent = otherDescs[otherDesc]
-                                if descContent == otherDescContent:
-                                    modLog = 'ML: ' + str(mod == otherMod)
-                                    if mod != '':
-                                        modLog += ' Mod=' + mod
-                                    if otherMod != '':
-                                        modLog += ' OtherMod=' + otherMod
-                                    writeLog(f, 'Identical Stat: ' + stat_x + ' and ' + stat_y + ' | ' + modLog + ' | Desc: \'' + descContent + '\'')
-        writeLog(f, '---')
-        writeLog(f, '')
\ No newline at end of file
+                for descContent in getDescriptions(stat_type_x[stat_x]['text']['1']):
+                    descIndex.setdefault(descContent, {}).setdefault(stat_x, mod)
+        for descContent, identicalStats in descIndex.items():
+            if len(identicalStats) < 2:
+                continue
+            identicalStats = list(identicalStats.items())
+            for statIdx, (stat_x, mod) in enumerate(identicalStats):
+                for stat_y, otherMod in identicalStats[statIdx + 1:]:
+                    modLog = 'ML: ' + str(mod == otherMod)
+                    if mod != '':
+                        modLog += ' Mod=' + mod
+                    if otherMod != '':
+                        modLog += ' OtherMod=' + otherMod
+                    # path ends in both stats, old/new hold their mods and value the shared description
+                    record = diffEngine.DiffRecord(IDENTICAL, (statType, stat_x, stat_y), mod, otherMod, None, descContent)
+                    writeLog('Identical Stat: ' + stat_x + ' and ' + stat_y + ' | ' + modLog + ' | Desc: \'' + descContent + '\'', record)
+        writeLog('---')
+        writeLog('')
+
+def main(cache=None):
+    validationCommon.runSingle(fileName, validate, 'validate-identical-' + fileName + '.log', cache)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import random
+
+import diffEngine
+import regexCache
+import validationCommon
+from validateIdenticalStats import getDescriptions
+from validateStats import getLanguages
+
+fileName = 'stats'
+
+RENAMED = 'Renamed'
+
+# texts with at least this share of shingles in common (Jaccard similarity) are reported as a rename
+threshold = 0.5
+# MinHash signature of numBands bands of bandSize values, a pair with similarity s shares a band with a probability
+# of 1 - (1 - s^bandSize)^numBands, which is about 2/3 at s = 0.5 and above 0.99 from s = 0.75
+numBands = 16
+bandSize = 4
+shingleSize = 3
+
+# the hash functions are the 64-bit shingle hash xor a random mask, fixed so every run pairs the same texts
+hashRandom = random.Random(0)
+hashMasks = [hashRandom.getrandbits(64) for _ in range(numBands * bandSize)]
+
+def getShingles(text):
+    # character shingles, so languages without spaces between words (chinese, japanese, thai) work as well
+    text = ' '.join(text.split())
+    if len(text) <= shingleSize:
+        return {text}
+    return {text[idx:idx + shingleSize] for idx in range(len(text) - shingleSize + 1)}
+
+shingleHashes = {}
+
+def getSignature(shingles):
+    hashes = []
+    for shingle in shingles:
+        shingleHash = shingleHashes.get(shingle)
+        if shingleHash is None:
+            shingleHash = shingleHashes[shingle] = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        hashes.append(shingleHash)
+    return [min([shingleHash ^ mask for shingleHash in hashes]) for mask in hashMasks]
+
+def getLine(regex):
+    # a line the text regex matches, with a number for every placeholder
+    return validationCommon.getStatDescription(regex).replace('#', '1')
+
+def stillMatches(originalRegex, newRegex):
+    # whether item lines of the original text are still matched by the new regex, e.g. when only a + got dropped
+    regex = regexCache.compile(newRegex)
+    return regex is not None and regex.match(getLine(originalRegex)) is not None
+
+def findRenames(removedTexts, addedTexts):
+    # [(removed index, added index, similarity)], each text is in at most one pair. Candidates are the pairs that
+    # share a band of their MinHash signatures, only those have their similarity computed.
+    removedShingles = [getShingles(validationCommon.getStatDescription(text)) for text in removedTexts]
+    addedShingles = [getShingles(validationCommon.getStatDescription(text)) for text in addedTexts]
+    buckets = {}
+    for removedIdx, shingles in enumerate(removedShingles):
+        signature = getSignature(shingles)
+        for band in range(numBands):
+            buckets.setdefault((band, tuple(signature[band * bandSize:(band + 1) * bandSize])), []).append(removedIdx)
+    pairs = []
+    for addedIdx, shingles in enumerate(addedShingles):
+        signature = getSignature(shingles)
+        candidates = set()
+        for band in range(numBands):
+            candidates.update(buckets.get((band, tuple(signature[band * bandSize:(band + 1) * bandSize])), ()))
+        for removedIdx in candidates:
+            similarity = len(shingles & removedShingles[removedIdx]) / len(shingles | removedShingles[removedIdx])
+            if similarity >= threshold:
+                pairs.append((-similarity, removedIdx, addedIdx))
+    # the most similar pairs first
+    pairs.sort()
+    renames = []
+    pairedRemoved = set()
+    pairedAdded = set()
+    for similarity, removedIdx, addedIdx in pairs:
+        if removedIdx not in pairedRemoved and addedIdx not in pairedAdded:
+            pairedRemoved.add(removedIdx)
+            pairedAdded.add(addedIdx)
+            renames.append((removedIdx, addedIdx, -similarity))
+    renames.sort()
+    return renames
+
+def indexTexts(trades, language):
+    # {text: first trade id} of a language block of a stat type
+    texts = {}
+    for tradeId, trade in trades.items():
+        if isinstance(trade, dict) and language in trade.get('text', {}):
+            for text in getDescriptions(trade['text'][language]):
+                texts.setdefault(text, tradeId)
+    return texts
+
+def validate(originalStats, newStats, writeLog):
+    languages = getLanguages(originalStats, newStats)
+    for statType in originalStats:
+        if statType not in newStats:
+            continue
+        writeLog('Checking stat type: ' + statType)
+        originalTrades = originalStats[statType]
+        newTrades = newStats[statType]
+        for language in languages:
+            originalTexts = indexTexts(originalTrades, language)
+            newTexts = indexTexts(newTrades, language)
+            removedTexts = [text for text in originalTexts if text not in newTexts]
+            addedTexts = [text for text in newTexts if text not in originalTexts]
+            if not removedTexts or not addedTexts:
+                continue
+            for removedIdx, addedIdx, similarity in findRenames(removedTexts, addedTexts):
+                originalText = removedTexts[removedIdx]
+                newText = addedTexts[addedIdx]
+                originalTradeId = originalTexts[originalText]
+                newTradeId = newTexts[newText]
+                # path ends in both trade ids and the language, value is the similarity
+                record = diffEngine.DiffRecord(RENAMED, (statType, originalTradeId, newTradeId, language), originalText, newText, None, round(similarity, 3))
+                note = ' (Still matches the original text)' if stillMatches(originalText, newText) else ''
+                writeLog(f'Renamed {statType}.{originalTradeId} -> {newTradeId} [{language}] (Original: {originalText} | New: {newText}) (Score: {similarity:.2f}){note}', record)
+        writeLog('---')
+        writeLog('')
+
+def main(cache=None):
+    validationCommon.run(fileName, validate, cache=cache, logFileName='validate-renamed-' + fileName + '.log')
+
+if __name__ == '__main__':
+    main()
@@ -1,130 +1,228 @@
-import json
-import io
+import functools
+
+import diffEngine
+import jsonStream
+import validationCommon
 
 fileName = 'stats'
 
-def writeLog(logFile, log):
-    print(log.encode("utf-8"))
-    logFile.write(log + "\n")
-
-#open stats files
-with open(fileName + '.json', 'r', encoding='utf-8') as f:
-    originalStats = json.load(f)
-with open('newFiles/' + fileName + '.json', 'r', encoding='utf-8') as f:
-    newStats = json.load(f)
-
-with io.open('validate-' + fileName + '.log', 'w', encoding='utf-8') as f:
-    # check which data got removed or changed
-    for originalType in originalStats:
-        #writeLog(f, f'Checking {originalId}')
-        if originalType not in newStats:
-            writeLog(f, f'Missing {originalType}')
+englishLang = '1'
+
+# stat type, trade id, 'text' and language block, equal language blocks aren't compared
+hashDepth = 4
+
+def getEnglishValue(stat):
+    # the first english text value of a trade stat, if there is one
+    if 'text' not in stat or englishLang not in stat['text'] or len(stat['text'][englishLang]) == 0:
+        return None
+    textObj = stat['text'][englishLang][0]
+    return textObj[list(textObj)[0]]
+
+def indexTexts(texts):
+    # first index of every text key and first (index, key) of every text value, in scan order
+    keyIndex = {}
+    valueIndex = {}
+    for textIdx, textObj in enumerate(texts):
+        for textKey, textValue in textObj.items():
+            keyIndex.setdefault(textKey, textIdx)
+            valueIndex.setdefault(textValue, (textIdx, textKey))
+    return keyIndex, valueIndex
+
+def diffTextEntries(langPath, originalLangTexts, newLangTexts, append):
+    # compares the text entries of one language, entries are matched by index, key and finally by value
+
+    # check which text got removed or changed
+    newKeyIndex = None
+    for originalTextIdx, originalTextObj in enumerate(originalLangTexts):
+        for originalTextKey in originalTextObj:
+            originalTextValue = originalTextObj[originalTextKey]
+            textPath = langPath + (originalTextIdx, originalTextKey)
+            originalTextFound = False
+            if originalTextIdx < len(newLangTexts):
+                newTextObj = newLangTexts[originalTextIdx]
+                if originalTextKey in newTextObj:
+                    originalTextFound = True
+                    newTextValue = newTextObj[originalTextKey]
+                    if originalTextValue != newTextValue:
+                        append(diffEngine.DiffRecord(diffEngine.CHANGED, textPath, originalTextValue, newTextValue, 'Value'))
+            if not originalTextFound:
+                if newKeyIndex is None:
+                    newKeyIndex, newValueIndex = indexTexts(newLangTexts)
+                newTextIdx = newKeyIndex.get(originalTextKey)
+                if newTextIdx is not None:
+                    originalTextFound = True
+                    newTextValue = newLangTexts[newTextIdx][originalTextKey]
+                    if originalTextValue != newTextValue:
+                        append(diffEngine.DiffRecord(diffEngine.CHANGED, textPath, originalTextValue, newTextValue, 'Value'))
+                    if originalTextIdx != newTextIdx:
+                        append(diffEngine.DiffRecord(diffEngine.CHANGED, textPath, originalTextIdx, newTextIdx, 'Idx', originalTextValue))
+                elif originalTextValue in newValueIndex:
+                    originalTextFound = True
+                    newTextIdx, newTextKey = newValueIndex[originalTextValue]
+                    append(diffEngine.DiffRecord(diffEngine.CHANGED, textPath, originalTextKey, newTextKey, 'Key', originalTextValue))
+                    if originalTextIdx != newTextIdx:
+                        append(diffEngine.DiffRecord(diffEngine.CHANGED, textPath, originalTextIdx, newTextIdx, 'Idx', originalTextValue))
+            if not originalTextFound:
+                append(diffEngine.DiffRecord(diffEngine.MISSING, textPath, originalTextValue, None))
+
+    # check which text got added
+    for newTextIdx, newTextObj in enumerate(newLangTexts):
+        textPath = langPath + (newTextIdx,)
+        if newTextIdx >= len(originalLangTexts):
+            append(diffEngine.DiffRecord(diffEngine.ADDED, textPath, None, newTextObj))
+            for newTextKey in newTextObj:
+                append(diffEngine.DiffRecord(diffEngine.ADDED, textPath + (newTextKey,), None, newTextObj[newTextKey]))
+        else:
+            originalTextObj = originalLangTexts[newTextIdx]
+            originalTextValues = originalTextObj.values()
+            for newTextKey in newTextObj:
+                newTextValue = newTextObj[newTextKey]
+                if newTextKey not in originalTextObj and newTextValue not in originalTextValues:
+                    append(diffEngine.DiffRecord(diffEngine.ADDED, textPath + (newTextKey,), None, newTextValue))
+
+def diffText(path, originalText, newText, append, originalHashes=None, newHashes=None, diffEntries=diffTextEntries):
+    # compares the 'text' blocks of a trade stat, language blocks with equal hashes are skipped
+    # diffEntries: compares the entries of a language block, see diffTextEntries
+    if len(path) != 3 or path[2] != 'text':
+        return False
+    # added languages follow the language before them in newText, like the keys in diffEngine.diffTrees
+    addedLangs = {}
+    previousLang = None
+    for lang in newText:
+        if lang in originalText:
+            previousLang = lang
         else:
-            for originalTradeId in originalStats[originalType]:
-                originalLang = '1'
-                if originalTradeId not in newStats[originalType]:
-                    originalTrade = originalStats[originalType][originalTradeId]
-                    originalKey = 'text'
-                    if originalKey in originalTrade and originalLang in originalTrade[originalKey]:
-                        originalTextObj = originalStats[originalType][originalTradeId][originalKey][originalLang][0]
-                        writeLog(f, f'Missing {originalType}.{originalTradeId} (Value: {originalTextObj[list(originalTextObj)[0]]})')
-                    else:
-                        writeLog(f, f'Missing {originalType}.{originalTradeId}')
-                else:
-                    for originalKey in originalStats[originalType][originalTradeId]:
-                        if originalKey not in newStats[originalType][originalTradeId]:
-                            if originalKey != 'text':
-                                writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey} (Value: {originalStats[originalType][originalTradeId][originalKey]})')
-                            else:
-                                if originalLang in originalStats[originalType][originalTradeId][originalKey]:
-                                    originalTextObj = originalStats[originalType][originalTradeId][originalKey][originalLang][0]
-                                    writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey} (Value: {originalTextObj[list(originalTextObj)[0]]})')
-                                else:
-                                    writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey}')
-                        elif originalKey == 'text':
-                            if originalLang not in originalStats[originalType][originalTradeId][originalKey]:
-                                writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey}.{originalLang}')
-                            elif originalLang not in newStats[originalType][originalTradeId][originalKey]:
-                                writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey}.{originalLang}')
-                            else:
-                                for originalTextIdx, originalTextObj in enumerate(originalStats[originalType][originalTradeId][originalKey][originalLang]):
-                                    newLang = newStats[originalType][originalTradeId][originalKey][originalLang]
-                                    for originalTextKey in originalTextObj:
-                                        originalTextValue = originalTextObj[originalTextKey]
-                                        originalTextFound = False
-                                        if originalTextIdx < len(newLang):
-                                            newTextObj = newLang[originalTextIdx]
-                                            if originalTextKey in newTextObj:
-                                                originalTextFound = True
-                                                newTextValue = newTextObj[originalTextKey]
-                                                if originalTextValue != newTextValue:
-                                                    writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} Value (Original: {originalTextValue} | New: {newTextValue})')
-                                        if not originalTextFound:
-                                            for newTextIdx, newTextObj in enumerate(newLang):
-                                                if originalTextKey in newTextObj:
-                                                    originalTextFound = True
-                                                    newTextValue = newTextObj[originalTextKey]
-                                                    if originalTextValue != newTextValue:
-                                                        writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} Value (Original: {originalTextValue} | New: {newTextValue})')
-                                                    if originalTextIdx != newTextIdx:
-                                                        writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} Idx (Original: {originalTextIdx} | New: {newTextIdx}) (Value: {originalTextValue})')
-                                                    break
-                                            if not originalTextFound:
-                                                for newTextIdx, newTextObj in enumerate(newLang):
-                                                    for newTextKey in newTextObj:
-                                                        newTextValue = newTextObj[newTextKey]
-                                                        if originalTextValue == newTextValue:
-                                                            originalTextFound = True
-                                                            writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} Key (Original: {originalTextKey} | New: {newTextKey}) (Value: {originalTextValue})')
-                                                            if originalTextIdx != newTextIdx:
-                                                                writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} Idx (Original: {originalTextIdx} | New: {newTextIdx}) (Value: {originalTextValue})')
-                                                            break
-                                                    if originalTextFound:
-                                                        break
-                                        if not originalTextFound:
-                                            writeLog(f, f'Missing {originalType}.{originalTradeId}.{originalKey}.{originalLang}[{originalTextIdx}].{originalTextKey} (Value: {originalTextValue})')
-                        else:
-                            originalValue = str(originalStats[originalType][originalTradeId][originalKey])
-                            newValue = str(newStats[originalType][originalTradeId][originalKey])
-                            if originalValue != newValue:
-                                writeLog(f, f'Changed {originalType}.{originalTradeId}.{originalKey} (Original: {originalValue} | New: {newValue})')
-
-    # check if which new data got added
-    for newType in newStats:
-        if newType not in originalStats:
-           writeLog(f, f'Added {newType}')
+            addedLangs.setdefault(previousLang, []).append(lang)
+    for lang in addedLangs.get(None, ()):
+        append(diffEngine.DiffRecord(diffEngine.ADDED, path + (lang,), None, newText[lang]))
+    for lang in originalText:
+        langPath = path + (lang,)
+        if lang not in newText:
+            append(diffEngine.DiffRecord(diffEngine.MISSING, langPath, originalText[lang], None))
+            continue
+        if originalHashes is None or newHashes is None or langPath not in originalHashes or originalHashes[langPath] != newHashes.get(langPath):
+            diffEntries(langPath, originalText[lang], newText[lang], append)
+        for addedLang in addedLangs.get(lang, ()):
+            append(diffEngine.DiffRecord(diffEngine.ADDED, path + (addedLang,), None, newText[addedLang]))
+    return True
+
+def formatRecord(record):
+    path = record.path
+    pathName = diffEngine.formatPath(path)
+    if record.kind == diffEngine.MISSING:
+        if len(path) == 2:
+            value = getEnglishValue(record.old)
+        elif len(path) == 3 and path[2] == 'text':
+            value = getEnglishValue({'text': record.old})
+        elif len(path) == 3 or len(path) == 6:
+            value = record.old
+        else:
+            return f'Missing {pathName}'
+        if value is None:
+            return f'Missing {pathName}'
+        return f'Missing {pathName} (Value: {value})'
+    elif record.kind == diffEngine.CHANGED:
+        if record.aspect is None:
+            return f'Changed {pathName} (Original: {record.old} | New: {record.new})'
+        elif record.aspect == 'Value':
+            return f'Changed {pathName} Value (Original: {record.old} | New: {record.new})'
+        return f'Changed {pathName} {record.aspect} (Original: {record.old} | New: {record.new}) (Value: {record.value})'
+    else:
+        if len(path) == 2:
+            value = getEnglishValue(record.new)
+        elif len(path) == 6:
+            value = record.new
         else:
-            for newTradeId in newStats[newType]:
-                if newTradeId not in originalStats[newType]:
-                    newEnglishStatNames = newStats[newType][newTradeId]['text']['1'][0]
-                    newEnglish = newEnglishStatNames[list(newEnglishStatNames.keys())[0]]
-                    writeLog(f, f'Added {newType}.{newTradeId} (Value: {newEnglish})')
-                else:
-                    for newKey in newStats[newType][newTradeId]:
-                        if newKey not in originalStats[newType][newTradeId]:
-                            writeLog(f, f'Added {newType}.{newTradeId}.{newKey}')
-                        elif newKey == 'text':
-                            for newLang in newStats[newType][newTradeId][newKey]:
-                                if newLang not in originalStats[newType][newTradeId][newKey]:
-                                    writeLog(f, f'Added {newType}.{newTradeId}.{newKey}.{newLang}')
-                                else:
-                                    for newTextIdx, newTextObj in enumerate(newStats[newType][newTradeId][newKey][newLang]):
-                                        originalLang = originalStats[newType][newTradeId][newKey][newLang]
-                                        if newTextIdx >= len(originalLang):
-                                            writeLog(f, f'Added {newType}.{newTradeId}.{newKey}.{newLang}[{newTextIdx}]')
-                                            for newTextKey in newTextObj:
-                                                newTextValue = newTextObj[newTextKey]
-                                                writeLog(f, f'Added {newType}.{newTradeId}.{newKey}.{newLang}[{newTextIdx}].{newTextKey} (Value: {newTextValue})')
-                                        else:
-                                            originalTextObj = originalLang[newTextIdx]
-                                            for newTextKey in newTextObj:
-                                                newTextValue = newTextObj[newTextKey]
-                                                if not newTextKey in originalTextObj:
-                                                    originalTextValueFound = False
-                                                    for originalTextKey in originalTextObj:
-                                                        originalTextValue = originalTextObj[originalTextKey]
-                                                        if newTextValue == originalTextValue:
-                                                            originalTextValueFound = True
-                                                            break
-                                                    if not originalTextValueFound:
-                                                        writeLog(f, f'Added {newType}.{newTradeId}.{newKey}.{newLang}[{newTextIdx}].{newTextKey} (Value: {newTextValue})')
+            return f'Added {pathName}'
+        if value is None:
+            return f'Added {pathName}'
+        return f'Added {pathName} (Value: {value})'
+
+def findTextsWithoutLang(originalStats, newStats):
+    # original text without english is reported even when the trade stat didn't change
+    records = []
+    for originalType, originalTrades in originalStats.items():
+        newTrades = newStats.get(originalType)
+        if not isinstance(newTrades, dict):
+            continue
+        for originalTradeId, originalTrade in originalTrades.items():
+            if 'text' in originalTrade and englishLang not in originalTrade['text'] and 'text' in newTrades.get(originalTradeId, ()):
+                records.append(diffEngine.DiffRecord(diffEngine.MISSING, (originalType, originalTradeId, 'text', englishLang), None, None))
+    return records
+
+def descendStats(path):
+    # stat types and trade ids are walked, a trade id's values are compared as a whole
+    return len(path) < 3
+
+def getLanguages(*statsFiles):
+    # all text languages in numeric order
+    languages = set()
+    for stats in statsFiles:
+        for trades in stats.values():
+            if isinstance(trades, dict):
+                for trade in trades.values():
+                    if isinstance(trade, dict) and 'text' in trade:
+                        languages.update(trade['text'])
+    return sorted(languages, key=lambda lang: (len(lang), lang))
+
+def diffStats(originalStats, newStats, originalHashes=None, newHashes=None, diffEntries=diffTextEntries):
+    records = findTextsWithoutLang(originalStats, newStats)
+    handle = functools.partial(diffText, originalHashes=originalHashes, newHashes=newHashes, diffEntries=diffEntries)
+    records += diffEngine.diffTrees(originalStats, newStats, descend=descendStats, handle=handle, originalHashes=originalHashes, newHashes=newHashes)
+    return records
+
+def diffLanguageBlocks(blocks):
+    # [[DiffRecord]] of [(language path, original texts, new texts)] of a single language, runs in the worker
+    # processes of validate
+    langRecords = []
+    for langPath, originalLangTexts, newLangTexts in blocks:
+        records = []
+        diffTextEntries(langPath, originalLangTexts, newLangTexts, records.append)
+        langRecords.append(records)
+    return langRecords
+
+def validate(originalStats, newStats, writeLog, originalHashes=None, newHashes=None):
+    # the structure is diffed here, the language blocks that differ are only collected and a placeholder (their
+    # path) takes the place of their records
+    blocks = {}
+
+    def diffLater(langPath, originalLangTexts, newLangTexts, append):
+        blocks.setdefault(langPath[-1], []).append((langPath, originalLangTexts, newLangTexts))
+        append(langPath)
+
+    records = diffStats(originalStats, newStats, originalHashes, newHashes, diffLater)
+    # each language is checked on its own worker, which only gets the blocks of its language
+    languages = [lang for lang in getLanguages(originalStats, newStats) if lang in blocks]
+    langRecords = {}
+    for lang, results in zip(languages, validationCommon.mapParallel(diffLanguageBlocks, [blocks[lang] for lang in languages])):
+        for (langPath, _, _), blockRecords in zip(blocks[lang], results):
+            langRecords[langPath] = blockRecords
+    # the placeholders are replaced by their records, so they're in walk order like in diffStats
+    mergedRecords = []
+    for record in records:
+        if type(record) is tuple:
+            mergedRecords += langRecords[record]
+        else:
+            mergedRecords.append(record)
+    for record in diffEngine.orderRecords(mergedRecords):
+        writeLog(formatRecord(record), record)
+
+def validateStreamed(originalPath, newPath, writeLog):
+    # diffs one stat type at a time, only the additions are kept until the end
+    addedRecords = []
+    for (statType,), originalType, newType in jsonStream.iterMemberPairs(originalPath, newPath):
+        originalStats = {statType: originalType} if originalType is not None else {}
+        newStats = {statType: newType} if newType is not None else {}
+        for record in diffStats(originalStats, newStats):
+            if record.kind == diffEngine.ADDED:
+                addedRecords.append(record)
+            else:
+                writeLog(formatRecord(record), record)
+    for record in addedRecords:
+        writeLog(formatRecord(record), record)
+
+def main(cache=None):
+    validationCommon.run(fileName, validate, hashDepth, validateStreamed, cache)
+
+if __name__ == '__main__':
+    main()
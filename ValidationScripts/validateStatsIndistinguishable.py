@@ -1,42 +1,47 @@
-import json
-import io
+import diffEngine
+import jsonStream
+import validationCommon
 
 fileName = 'stats-indistinguishable'
 
-def writeLog(logFile, log):
-	print(log.encode("utf-8"))
-	logFile.write(log + "\n")
+def diffTradeIds(path, originalTradeIds, newTradeIds, append):
+	# the indistinguishable trade ids are compared as sets
+	if len(path) != 2:
+		return False
+	newSet = set(newTradeIds)
+	for originalTradeIdListItem in originalTradeIds:
+		if originalTradeIdListItem not in newSet:
+			append(diffEngine.DiffRecord(diffEngine.MISSING, path + ('[]', originalTradeIdListItem), originalTradeIdListItem, None))
+	originalSet = set(originalTradeIds)
+	for newTradeIdListItem in newTradeIds:
+		if newTradeIdListItem not in originalSet:
+			append(diffEngine.DiffRecord(diffEngine.ADDED, path + ('[]', newTradeIdListItem), None, newTradeIdListItem))
+	return True
 
-#open stats files
-with open(fileName + '.json', 'r', encoding='utf-8') as f:
-	originalStats = json.load(f)['indistinguishableStats']
-with open('newFiles/' + fileName + '.json', 'r', encoding='utf-8') as f:
-	newStats = json.load(f)['indistinguishableStats']
+def diffStats(originalStats, newStats):
+	return diffEngine.diffTrees(originalStats, newStats, descend=lambda path: len(path) < 2, handle=diffTradeIds)
 
-with io.open('validate-' + fileName + '.log', 'w', encoding='utf-8') as f:
-	# check which data got removed or changed
-	for originalType in originalStats:
-		#writeLog(f, f'Checking {originalId}')
-		if originalType not in newStats:
-			writeLog(f, f'Missing {originalType}')
-		else:
-			for originalTradeId in originalStats[originalType]:
-				if originalTradeId not in newStats[originalType]:
-					writeLog(f, f'Missing {originalType}.{originalTradeId}')
-				else:
-					for originalTradeIdListItem in originalStats[originalType][originalTradeId]:
-						if originalTradeIdListItem not in newStats[originalType][originalTradeId]:
-							writeLog(f, f'Missing {originalType}.{originalTradeId}.[].{originalTradeIdListItem}')
+def validate(originalStats, newStats, writeLog):
+	records = diffStats(originalStats['indistinguishableStats'], newStats['indistinguishableStats'])
+	for record in diffEngine.orderRecords(records):
+		writeLog(f'{record.kind} {diffEngine.formatPath(record.path)}', record)
 
-	# check if which new data got added
-	for newType in newStats:
-		if newType not in originalStats:
-		   writeLog(f, f'Added {newType}')
-		else:
-			for newTradeId in newStats[newType]:
-				if newTradeId not in originalStats[newType]:
-					writeLog(f, f'Added {newType}.{newTradeId}')
-				else:
-					for newTradeIdListItem in newStats[newType][newTradeId]:
-						if newTradeIdListItem not in originalStats[newType][newTradeId]:
-							writeLog(f, f'Added {newType}.{newTradeId}.[].{newTradeIdListItem}')
+def validateStreamed(originalPath, newPath, writeLog):
+	# diffs one stat type at a time, only the additions are kept until the end
+	addedRecords = []
+	for (_, statType), originalType, newType in jsonStream.iterMemberPairs(originalPath, newPath, 2):
+		originalStats = {statType: originalType} if originalType is not None else {}
+		newStats = {statType: newType} if newType is not None else {}
+		for record in diffStats(originalStats, newStats):
+			if record.kind == diffEngine.ADDED:
+				addedRecords.append(record)
+			else:
+				writeLog(f'{record.kind} {diffEngine.formatPath(record.path)}', record)
+	for record in addedRecords:
+		writeLog(f'{record.kind} {diffEngine.formatPath(record.path)}', record)
+
+def main(cache=None):
+	validationCommon.run(fileName, validate, validateStreamed=validateStreamed, cache=cache)
+
+if __name__ == '__main__':
+	main()
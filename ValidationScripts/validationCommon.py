@@ -0,0 +1,126 @@
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+
+import diffEngine
+import reportWriter
+import subtreeHashes
+
+def loadJson(path, cache=None):
+    # cache: optional dict shared by the validators of one run, so every file is only parsed once
+    if cache is not None and path in cache:
+        return cache[path]
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = json.load(f)
+    if cache is not None:
+        cache[path] = tree
+    return tree
+
+def getHashes(path, tree, hashDepth, cache=None):
+    if cache is None:
+        return subtreeHashes.getHashes(path, tree, hashDepth)
+    key = (path, hashDepth)
+    if key not in cache:
+        cache[key] = subtreeHashes.getHashes(path, tree, hashDepth)
+    return cache[key]
+
+# see LabelsWithSuffix in Program.cs
+labelSuffixes = {
+    'implicit': ' (implicit)',
+    'crafted': ' (crafted)',
+    'fractured': ' (fractured)',
+    'enchant': ' (enchant)',
+    'crucible': ' (crucible)',
+    'necropolis': ' (implicit)',
+}
+
+def getStatDescriptionRegex(statDescription):
+    # see StatDescription.StatLine.GetStatDescriptionRegex
+    regex = statDescription.replace('+#', '#').replace('+', '\\+').replace('(', '\\(').replace(')', '\\)').replace('#', '(\\S+)')
+    return f'^{regex}$'
+
+def getStatDescription(regex):
+    # the description a text regex was built from, the inverse of getStatDescriptionRegex with # for the
+    # placeholders (+# comes back as #)
+    if regex.startswith('^') and regex.endswith('$'):
+        regex = regex[1:-1]
+    return regex.replace('(\\S+)', '#').replace('\\+', '+').replace('\\(', '(').replace('\\)', ')')
+
+def getPaths(fileName):
+    return fileName + '.json', 'newFiles/' + fileName + '.json'
+
+def isQuiet():
+    # --quiet turns off all console output of the validators
+    return '--quiet' in sys.argv[1:]
+
+def openReport(logFileName, source):
+    # the findings of validate-x.log also go to validate-x.jsonl, and with --binary to validate-x.findings
+    baseName = os.path.splitext(logFileName)[0]
+    binaryPath = baseName + '.findings' if '--binary' in sys.argv[1:] else None
+    return reportWriter.ReportWriter(logFileName, isQuiet(), baseName + '.jsonl', binaryPath, source)
+
+def getJobs():
+    # --jobs N limits the worker processes of validators that run in parallel, defaults to the number of cpus
+    if '--jobs' in sys.argv[1:-1]:
+        return max(1, int(sys.argv[sys.argv.index('--jobs') + 1]))
+    return os.cpu_count() or 1
+
+def mapParallel(function, items):
+    # maps function over items on a process pool and returns the results in the order of items. The items and
+    # results are pickled, and the workers are spawned on every platform: the caller may already run the writer
+    # thread of its report, which a forked worker would inherit in whatever state it was in.
+    items = list(items)
+    jobs = min(getJobs(), len(items))
+    if jobs <= 1:
+        return list(map(function, items))
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=context) as executor:
+        return list(executor.map(function, items))
+
+def run(fileName, validate, hashDepth=None, validateStreamed=None, cache=None, logFileName=None):
+    # hashDepth: compare subtrees up to this depth by their (persisted) hashes, see subtreeHashes
+    # validateStreamed: used instead of validate when --stream is passed, it reads the files itself (see jsonStream)
+    # cache: see loadJson
+    # logFileName: defaults to validate-<fileName>.log
+    originalPath, newPath = getPaths(fileName)
+    if logFileName is None:
+        logFileName = 'validate-' + fileName + '.log'
+    if validateStreamed is not None and '--stream' in sys.argv[1:]:
+        with openReport(logFileName, originalPath) as report:
+            validateStreamed(originalPath, newPath, report.writeLog)
+        return
+    original = loadJson(originalPath, cache)
+    new = loadJson(newPath, cache)
+    hashes = {}
+    if hashDepth is not None:
+        hashes['originalHashes'] = getHashes(originalPath, original, hashDepth, cache)
+        hashes['newHashes'] = getHashes(newPath, new, hashDepth, cache)
+    with openReport(logFileName, originalPath) as report:
+        validate(original, new, report.writeLog, **hashes)
+
+def runSingle(fileName, validate, logFileName, cache=None):
+    # for validators that only check the current file, without comparing it to newFiles/
+    tree = loadJson(fileName + '.json', cache)
+    with openReport(logFileName, fileName + '.json') as report:
+        validate(tree, report.writeLog)
+
+def validateTranslations(originalStats, newStats, writeLog):
+    # shared by the {language: {word: translation}} files (words, client-strings, base-item-types, ...)
+    languageRecords = {}
+    for record in diffEngine.diffTrees(originalStats, newStats, descend=lambda path: len(path) < 2):
+        languageRecords.setdefault(record.path[0], []).append(record)
+
+    for language in originalStats:
+        writeLog('Checking language type: ' + language)
+        for record in languageRecords.get(language, ()):
+            if record.kind == diffEngine.MISSING:
+                if len(record.path) == 1:
+                    writeLog('Missing: ' + language, record)
+                else:
+                    writeLog('Missing word: ' + record.path[1], record)
+            elif record.kind == diffEngine.CHANGED:
+                writeLog('Incorrect translation for: ' + language + ' ' + record.path[1] + ' (Original: ' + str(record.old) + ' | New: ' + str(record.new) + ')', record)
+        writeLog('---')
+        writeLog('')